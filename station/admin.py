@@ -7,13 +7,15 @@ from station.models import (
     Train,
     Route,
     Journey,
-    Ticket
+    Ticket,
+    SeatHold
 )
 
 
 class TicketInLine(admin.TabularInline):
     model = Ticket
     extra = 1
+    raw_id_fields = ("journey",)
 
 
 @admin.register(Order)
@@ -21,10 +23,15 @@ class OrderAdmin(admin.ModelAdmin):
     inlines = (TicketInLine,)
 
 
+@admin.register(Ticket)
+class TicketAdmin(admin.ModelAdmin):
+    raw_id_fields = ("journey", "order")
+
+
 admin.site.register(Crew)
 admin.site.register(Station)
 admin.site.register(TrainType)
 admin.site.register(Train)
 admin.site.register(Route)
 admin.site.register(Journey)
-admin.site.register(Ticket)
+admin.site.register(SeatHold)
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class StationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'station'
+
+    def ready(self):
+        from station import signals  # noqa: F401
+        from station.profiling import (
+            install_query_timing,
+            install_serializer_timing
+        )
+
+        install_query_timing()
+        install_serializer_timing()
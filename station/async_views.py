@@ -0,0 +1,322 @@
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.throttling import UserRateThrottle
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from station.events import redeem_ticket, seat_events
+from station.models import Journey
+from station.pagination import AsyncLimitOffsetPagination
+from station.serializers import (
+    JourneyListSerializer,
+    JourneyRetrieveSerializer,
+    JourneySeatsSerializer
+)
+from station.views import JourneyViewSet
+from train_station import settings
+
+
+class AsyncAPIView(View):
+    """Read-only view served on the event loop under ASGI.
+
+    Authentication and throttling match the DRF viewsets, but run in one
+    worker thread hop per request; the handlers themselves use the async
+    ORM, so waiting on the database or a long poll holds no thread.
+    """
+
+    http_method_names = ["get", "head", "options"]
+    authentication_class = JWTAuthentication
+    throttle_classes = (UserRateThrottle,)
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            await sync_to_async(self.initial)(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc)
+
+    def initial(self, request):
+        authenticator = self.authentication_class()
+        user_auth = authenticator.authenticate(request)
+        if user_auth is None:
+            raise exceptions.NotAuthenticated()
+        request.user, request.auth = user_auth
+
+        for throttle in (throttle() for throttle in self.throttle_classes):
+            if not throttle.allow_request(request, self):
+                raise exceptions.Throttled(throttle.wait())
+
+    def handle_exception(self, exc):
+        headers = {}
+        if isinstance(exc, exceptions.NotAuthenticated):
+            headers["WWW-Authenticate"] = (
+                self.authentication_class().authenticate_header(None)
+            )
+        if getattr(exc, "wait", None):
+            headers["Retry-After"] = str(int(exc.wait))
+
+        data = exc.detail
+        if not isinstance(data, (list, dict)):
+            data = {"detail": data}
+        return self.render(data, status=exc.status_code, headers=headers)
+
+    @staticmethod
+    def render(data, status=status.HTTP_200_OK, headers=None):
+        return HttpResponse(
+            JSONRenderer().render(data),
+            content_type="application/json",
+            status=status,
+            headers=headers
+        )
+
+    @staticmethod
+    def not_modified(etag):
+        return HttpResponse(
+            status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+
+    @staticmethod
+    async def journey_version(pk):
+        version = await (
+            Journey.objects
+            .filter(pk=pk)
+            .values_list("version", flat=True)
+            .afirst()
+        )
+        if version is None:
+            raise exceptions.NotFound()
+        return version
+
+
+class AsyncJourneyListView(AsyncAPIView):
+    async def get(self, request):
+        queryset = JourneyViewSet.filter_crews(
+            JourneyViewSet.list_queryset(Journey.objects.all()),
+            request.GET.get("crews")
+        )
+
+        paginator = AsyncLimitOffsetPagination()
+        drf_request = Request(request)
+        page = await paginator.apaginate_queryset(queryset, drf_request)
+        serializer = JourneyListSerializer(
+            page, many=True, context={"request": drf_request}
+        )
+        return self.render(
+            paginator.get_paginated_response(serializer.data).data
+        )
+
+
+class AsyncJourneyDetailView(AsyncAPIView):
+    async def get(self, request, pk):
+        namespaces = ("trains", "train_types", "routes", "stations", "crews")
+        version = await self.journey_version(pk)
+        etag = await sync_to_async(JourneyViewSet.format_etag)(
+            pk, version, namespaces
+        )
+        if JourneyViewSet.etag_matches(
+            etag, request.headers.get("If-None-Match")
+        ):
+            return self.not_modified(etag)
+
+        try:
+            journey = await JourneyViewSet.retrieve_queryset(
+                Journey.objects.all()
+            ).aget(pk=pk)
+        except Journey.DoesNotExist:
+            raise exceptions.NotFound()
+        serializer = JourneyRetrieveSerializer(
+            journey, context={"request": Request(request)}
+        )
+        return self.render(serializer.data, headers={"ETag": etag})
+
+
+class AsyncJourneySeatsView(AsyncAPIView):
+    """Seat map that long-polls while the client's ETag is current.
+
+    With ?wait=<seconds> a request whose If-None-Match matches the
+    current version is held until the journey changes or the wait
+    (capped at SEAT_MAP_LONG_POLL_TIMEOUT) expires. Waiting requests
+    sleep on the seat event broker and only query the version again
+    when their journey is notified, plus once when the wait expires to
+    catch changes made by other processes.
+    """
+
+    @staticmethod
+    def _wait(request):
+        wait = request.GET.get("wait", "0")
+        if not wait.isdigit():
+            raise exceptions.ValidationError(
+                {"wait": f"Expected seconds, not {wait}"}
+            )
+        return min(int(wait), settings.SEAT_MAP_LONG_POLL_TIMEOUT)
+
+    async def get(self, request, pk):
+        wait = self._wait(request)
+        deadline = time.monotonic() + wait
+        expired = not wait
+        if_none_match = request.headers.get("If-None-Match")
+
+        subscription = seat_events.subscribe(pk)
+        try:
+            etag = JourneyViewSet.format_etag(
+                pk, await self.journey_version(pk)
+            )
+            while JourneyViewSet.etag_matches(etag, if_none_match):
+                if expired:
+                    return self.not_modified(etag)
+                try:
+                    await asyncio.wait_for(
+                        subscription.get(),
+                        max(deadline - time.monotonic(), 0)
+                    )
+                except asyncio.TimeoutError:
+                    expired = True
+                etag = JourneyViewSet.format_etag(
+                    pk, await self.journey_version(pk)
+                )
+        finally:
+            seat_events.unsubscribe(subscription)
+
+        try:
+            journey = await (
+                Journey.objects.select_related("train").aget(pk=pk)
+            )
+        except Journey.DoesNotExist:
+            raise exceptions.NotFound()
+        return self.render(
+            JourneySeatsSerializer(journey).data,
+            headers={
+                "ETag": JourneyViewSet.format_etag(pk, journey.version)
+            }
+        )
+
+
+class TicketJWTAuthentication(JWTAuthentication):
+    """JWT from the Authorization header or a one-time ?ticket=.
+
+    Browsers cannot set headers on an EventSource, so event streams
+    also accept a ticket issued by the journey's seat-events-ticket
+    endpoint. Access tokens are never read from the query string.
+    """
+
+    def authenticate(self, request):
+        user_auth = super().authenticate(request)
+        ticket = request.GET.get("ticket")
+        if user_auth is not None or not ticket:
+            return user_auth
+
+        user = None
+        user_id = redeem_ticket(ticket, request.resolver_match.kwargs["pk"])
+        if user_id is not None:
+            user = get_user_model().objects.filter(
+                pk=user_id, is_active=True
+            ).first()
+        if user is None:
+            raise exceptions.AuthenticationFailed(
+                "Ticket is invalid, expired or already used"
+            )
+        return user, None
+
+
+class SeatEventStream:
+    """Server-sent events of one subscription, rendered lazily.
+
+    The broker only sees bookings committed by this process, so on every
+    heartbeat the journey version is compared with the last snapshot
+    sent and a new snapshot follows when another process changed it.
+    StreamingHttpResponse calls `close()` once the response is done,
+    including when the client disconnects, which drops the subscription.
+    """
+
+    def __init__(self, journey, subscription):
+        self.journey = journey
+        self.subscription = subscription
+
+    @staticmethod
+    def _event(event, data, event_id=None):
+        lines = [f"event: {event}"]
+        if event_id is not None:
+            lines.append(f"id: {event_id}")
+        lines.append(f"data: {json.dumps(data)}")
+        return "\n".join(lines) + "\n\n"
+
+    def _snapshot(self):
+        return self._event(
+            "snapshot",
+            {"seats": self.journey.seat_map.taken_seats()},
+            event_id=self.journey.version
+        )
+
+    async def _reload(self):
+        """Reload the journey if its version moved, False once deleted."""
+        journeys = Journey.objects.filter(pk=self.journey.pk)
+        version = await journeys.values_list("version", flat=True).afirst()
+        if version is None or version == self.journey.version:
+            return version is not None
+        journey = await journeys.select_related("train").afirst()
+        if journey is None:
+            return False
+        self.journey = journey
+        return True
+
+    async def __aiter__(self):
+        yield self._snapshot()
+        while True:
+            try:
+                message = await asyncio.wait_for(
+                    self.subscription.get(), settings.SEAT_EVENTS_HEARTBEAT
+                )
+            except asyncio.TimeoutError:
+                version = self.journey.version
+                if not await self._reload():
+                    yield self._event("resync", {})
+                    return
+                if self.journey.version != version:
+                    yield self._snapshot()
+                else:
+                    yield ": keep-alive\n\n"
+                continue
+
+            if message is None:
+                yield self._event("resync", {})
+                return
+            yield self._event(message.event, {"seats": message.seats})
+
+    def close(self):
+        seat_events.unsubscribe(self.subscription)
+
+
+class AsyncJourneySeatEventsView(AsyncAPIView):
+    """Server-sent events stream of seat changes of one journey.
+
+    Opens with a `snapshot` of the taken seats, then sends `taken` and
+    `released` deltas as bookings commit, and a new `snapshot` when the
+    seat map is rebuilt. A `resync` event means the client fell behind
+    and should reconnect.
+    """
+
+    authentication_class = TicketJWTAuthentication
+
+    async def get(self, request, pk):
+        subscription = seat_events.subscribe(pk)
+        try:
+            journey = await (
+                Journey.objects.select_related("train").aget(pk=pk)
+            )
+        except Journey.DoesNotExist:
+            seat_events.unsubscribe(subscription)
+            raise exceptions.NotFound()
+
+        return StreamingHttpResponse(
+            SeatEventStream(journey, subscription),
+            content_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
@@ -0,0 +1,105 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import caches
+from rest_framework.response import Response
+
+
+class ResponseCacheStats:
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, namespace: str, outcome: str):
+        with self._lock:
+            self._counts[(namespace, outcome)] += 1
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+        return {
+            namespace: {
+                "hits": counts.get((namespace, "hits"), 0),
+                "misses": counts.get((namespace, "misses"), 0),
+            }
+            for namespace in sorted({namespace for namespace, _ in counts})
+        }
+
+
+response_cache_stats = ResponseCacheStats()
+
+
+def _cache():
+    return caches["responses"]
+
+
+def _version_key(namespace: str) -> str:
+    return f"version:{namespace}"
+
+
+def namespace_version(namespace: str) -> int:
+    key = _version_key(namespace)
+    version = _cache().get(key)
+    if version is None:
+        _cache().add(key, time.time_ns(), timeout=None)
+        version = _cache().get(key)
+    return version
+
+
+def namespace_versions(namespaces) -> str:
+    return ",".join(
+        f"{namespace}={namespace_version(namespace)}"
+        for namespace in namespaces
+    )
+
+
+def invalidate_namespace(namespace: str):
+    try:
+        _cache().incr(_version_key(namespace))
+    except ValueError:
+        _cache().set(_version_key(namespace), time.time_ns(), timeout=None)
+
+
+class CachedResponseMixin:
+    """Cache list and retrieve responses of a read-mostly viewset.
+
+    Keys embed the current version of every namespace in
+    `cache_namespaces`; saving or deleting a model of one of those
+    namespaces bumps its version, which orphans the cached responses.
+    """
+
+    cache_namespaces = ()
+
+    def _response_cache_key(self) -> str:
+        versions = namespace_versions(self.cache_namespaces)
+        params = sorted(self.request.query_params.lists())
+        digest = hashlib.md5(
+            f"{self.request.path}?{params}".encode()
+        ).hexdigest()
+        return f"response:{versions}:{self.action}:{digest}"
+
+    def _cached_response(self, view, *args, **kwargs):
+        namespace = self.cache_namespaces[0]
+        key = self._response_cache_key()
+
+        data = _cache().get(key)
+        if data is not None:
+            response_cache_stats.record(namespace, "hits")
+            response = Response(data)
+            response["X-Cache"] = "HIT"
+            return response
+
+        response_cache_stats.record(namespace, "misses")
+        response = view(*args, **kwargs)
+        if response.status_code == 200:
+            _cache().set(key, response.data)
+        response["X-Cache"] = "MISS"
+        return response
+
+    def list(self, *args, **kwargs):
+        return self._cached_response(super().list, *args, **kwargs)
+
+    def retrieve(self, *args, **kwargs):
+        return self._cached_response(super().retrieve, *args, **kwargs)
@@ -0,0 +1,252 @@
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from heapq import heappop, heappush
+from typing import NamedTuple, Optional
+
+from station.models import Route
+from station.reloading import ReloadableState
+from train_station import settings
+
+UNREACHABLE = -1
+
+
+class ShortestPath(NamedTuple):
+    distance: int
+    stations: list
+    routes: list
+
+
+class RouteDistances(ReloadableState):
+    """Shortest network distances between stations over routes.
+
+    Routes are kept as compact adjacency arrays over dense station
+    indexes, with the shortest route between each pair of stations as
+    the edge. Dijkstra runs on demand from a source station and its
+    distance and predecessor arrays are memoized for up to
+    ROUTE_DISTANCE_CACHE_SIZE sources. A saved or deleted route only
+    rewrites the adjacency of its source station and drops the memoized
+    sources whose shortest path tree it can change; the arrays are only
+    rebuilt when a route joins a new station.
+    """
+
+    max_age_setting = "ROUTE_DISTANCE_MAX_AGE"
+
+    def __init__(self):
+        super().__init__()
+        self._edges = {}
+        self._rows = OrderedDict()
+        self._index = {}
+        self._stations = array("q")
+        self._offsets = array("q", [0])
+        self._targets = array("q")
+        self._weights = array("q")
+        self._routes = {}
+        self._pairs = {}
+
+    def _load(self):
+        self._rows.clear()
+        self._edges = {
+            route_id: (source, destination, distance)
+            for route_id, source, destination, distance in (
+                Route.objects
+                .values_list("id", "source_id", "destination_id", "distance")
+                .iterator(chunk_size=5000)
+            )
+        }
+        self._build()
+
+    def _build(self):
+        self._pairs = {}
+        for route_id, (source, destination, distance) in self._edges.items():
+            self._pairs.setdefault((source, destination), {})[route_id] = (
+                distance
+            )
+        shortest = {
+            pair: min(
+                (distance, route_id) for route_id, distance in routes.items()
+            )
+            for pair, routes in self._pairs.items()
+        }
+
+        stations = sorted(
+            {station for pair in shortest for station in pair}
+        )
+        if stations != list(self._stations):
+            self._rows.clear()
+        self._stations = array("q", stations)
+        self._index = {
+            station: index for index, station in enumerate(stations)
+        }
+
+        self._offsets = array("q", [0]) * (len(stations) + 1)
+        self._targets = array("q")
+        self._weights = array("q")
+        self._routes = {}
+        for (source, destination), (distance, route_id) in sorted(
+            shortest.items(),
+            key=lambda item: (self._index[item[0][0]], item[0][1])
+        ):
+            source, destination = self._index[source], self._index[destination]
+            self._offsets[source + 1] += 1
+            self._targets.append(destination)
+            self._weights.append(distance)
+            self._routes[(source, destination)] = route_id
+        for index in range(len(stations)):
+            self._offsets[index + 1] += self._offsets[index]
+
+    def _patch(self, source: int, destination: int):
+        """Point the edge between two stations at their shortest route."""
+        routes = self._pairs.get((source, destination))
+        source, destination = self._index[source], self._index[destination]
+        start, end = self._offsets[source], self._offsets[source + 1]
+        position = bisect_left(self._targets, destination, start, end)
+        present = position < end and self._targets[position] == destination
+
+        if routes:
+            distance, route_id = min(
+                (distance, route_id) for route_id, distance in routes.items()
+            )
+            self._routes[(source, destination)] = route_id
+            if present:
+                self._weights[position] = distance
+                return
+            self._targets.insert(position, destination)
+            self._weights.insert(position, distance)
+            shift = 1
+        elif present:
+            del self._routes[(source, destination)]
+            del self._targets[position]
+            del self._weights[position]
+            shift = -1
+        else:
+            return
+
+        for index in range(source + 1, len(self._offsets)):
+            self._offsets[index] += shift
+
+    def _apply(self, route_id: int, edge):
+        previous = self._edges.pop(route_id, None)
+        if previous is not None:
+            source, destination, _ = previous
+            routes = self._pairs[(source, destination)]
+            del routes[route_id]
+            if not routes:
+                del self._pairs[(source, destination)]
+        if edge is not None:
+            self._edges[route_id] = edge
+            source, destination, distance = edge
+            self._pairs.setdefault((source, destination), {})[route_id] = (
+                distance
+            )
+            if source not in self._index or destination not in self._index:
+                self._build()
+                return
+
+        for source, destination, _ in filter(None, (previous, edge)):
+            self._patch(source, destination)
+
+    def _dijkstra(self, source: int):
+        distances = array("q", [UNREACHABLE]) * len(self._stations)
+        previous = array("q", [UNREACHABLE]) * len(self._stations)
+        distances[source] = 0
+        queue = [(0, source)]
+        while queue:
+            distance, station = heappop(queue)
+            if distance > distances[station]:
+                continue
+            for edge in range(
+                self._offsets[station], self._offsets[station + 1]
+            ):
+                target = self._targets[edge]
+                candidate = distance + self._weights[edge]
+                if (
+                    distances[target] == UNREACHABLE
+                    or candidate < distances[target]
+                ):
+                    distances[target] = candidate
+                    previous[target] = station
+                    heappush(queue, (candidate, target))
+        return distances, previous
+
+    def _row(self, source: int):
+        row = self._rows.get(source)
+        if row is None:
+            row = self._rows[source] = self._dijkstra(source)
+            while len(self._rows) > settings.ROUTE_DISTANCE_CACHE_SIZE:
+                self._rows.popitem(last=False)
+        else:
+            self._rows.move_to_end(source)
+        return row
+
+    def _drop_rows(self, edge, added: bool):
+        source, destination, distance = edge
+        source = self._index.get(source)
+        destination = self._index.get(destination)
+        if source is None or destination is None:
+            return
+
+        for row_source, (distances, previous) in list(self._rows.items()):
+            if added:
+                reached = distances[source]
+                affected = reached != UNREACHABLE and (
+                    distances[destination] == UNREACHABLE
+                    or reached + distance < distances[destination]
+                )
+            else:
+                affected = previous[destination] == source
+            if affected:
+                del self._rows[row_source]
+
+    def update_route(self, route: Route):
+        with self._lock:
+            if not self.loaded:
+                return
+            edge = (route.source_id, route.destination_id, route.distance)
+            previous = self._edges.get(route.id)
+            if previous == edge:
+                return
+            if previous is not None:
+                self._drop_rows(previous, added=False)
+            self._drop_rows(edge, added=True)
+            self._apply(route.id, edge)
+
+    def remove_route(self, route_id: int):
+        with self._lock:
+            if not self.loaded or route_id not in self._edges:
+                return
+            self._drop_rows(self._edges[route_id], added=False)
+            self._apply(route_id, None)
+
+    def shortest_path(
+        self, source: int, destination: int
+    ) -> Optional[ShortestPath]:
+        with self._lock:
+            self._ensure_loaded()
+            source_index = self._index.get(source)
+            destination_index = self._index.get(destination)
+            if source_index is None or destination_index is None:
+                return None
+
+            distances, previous = self._row(source_index)
+            if distances[destination_index] == UNREACHABLE:
+                return None
+
+            stations = [destination]
+            routes = []
+            station = destination_index
+            while station != source_index:
+                routes.append(self._routes[(previous[station], station)])
+                station = previous[station]
+                stations.append(self._stations[station])
+
+            return ShortestPath(
+                distances[destination_index], stations[::-1], routes[::-1]
+            )
+
+    def distance(self, source: int, destination: int) -> Optional[int]:
+        path = self.shortest_path(source, destination)
+        return None if path is None else path.distance
+
+
+distances = RouteDistances()
@@ -0,0 +1,122 @@
+import asyncio
+import secrets
+import threading
+from typing import NamedTuple, Optional
+
+from django.core.cache import caches
+
+from train_station import settings
+
+
+class SeatEvent(NamedTuple):
+    event: str
+    seats: dict
+
+
+class Subscription:
+    def __init__(self, journey_id: int, max_size: int):
+        self.journey_id = journey_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(max_size)
+        self.overflowed = False
+
+    def put(self, event: SeatEvent):
+        if self.queue.full():
+            self.overflowed = True
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+        elif not self.overflowed:
+            self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class SeatEventBroker:
+    """In-process fan-out of seat changes to event stream subscribers.
+
+    Seats are published after the booking transaction commits, from
+    whatever thread committed it; each subscriber is an asyncio queue
+    drained on its own event loop. A subscriber that falls
+    `SEAT_EVENTS_QUEUE_SIZE` events behind receives None instead and has
+    to resynchronise. Only changes made by this process are seen.
+    """
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, journey_id: int) -> Subscription:
+        subscription = Subscription(
+            journey_id, settings.SEAT_EVENTS_QUEUE_SIZE
+        )
+        with self._lock:
+            self._subscribers.setdefault(journey_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.journey_id)
+            if subscribers is None:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.journey_id]
+
+    def subscriber_count(self, journey_id: int) -> int:
+        with self._lock:
+            return len(self._subscribers.get(journey_id, ()))
+
+    def publish(self, journey_id: int, event: str, seats):
+        with self._lock:
+            subscribers = list(self._subscribers.get(journey_id, ()))
+        if not subscribers:
+            return
+
+        grouped = {}
+        for cargo, seat in sorted(seats):
+            grouped.setdefault(cargo, []).append(seat)
+        message = SeatEvent(event, grouped)
+
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.put, message
+                )
+            except RuntimeError:
+                self.unsubscribe(subscription)
+
+
+seat_events = SeatEventBroker()
+
+
+def _ticket_key(ticket: str) -> str:
+    return f"seat-events-ticket:{ticket}"
+
+
+def issue_ticket(user_id: int, journey_id: int) -> str:
+    """Ticket opening one event stream of `journey_id` as `user_id`.
+
+    Browsers cannot set headers on an EventSource, and an access token
+    in the query string ends up in access logs; a ticket is only good
+    for one stream within SEAT_EVENTS_TICKET_TTL. Tickets are kept in
+    the "events" cache, which REDIS_URL shares between the WSGI workers
+    issuing them and the ASGI server redeeming them.
+    """
+    ticket = secrets.token_urlsafe(32)
+    caches["events"].set(
+        _ticket_key(ticket),
+        (user_id, journey_id),
+        settings.SEAT_EVENTS_TICKET_TTL.total_seconds()
+    )
+    return ticket
+
+
+def redeem_ticket(ticket: str, journey_id: int) -> Optional[int]:
+    """Return the user a ticket was issued to and invalidate it."""
+    cache = caches["events"]
+    issued = cache.get(_ticket_key(ticket))
+    if issued is None or not cache.delete(_ticket_key(ticket)):
+        return None
+    user_id, ticket_journey_id = issued
+    return user_id if ticket_journey_id == journey_id else None
@@ -0,0 +1,129 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+
+from station.models import Order, Ticket
+from station.params import datetime_param
+from station.streaming import streaming_content
+from train_station import settings
+
+ORDER_COLUMNS = (
+    ("id", "id"),
+    ("created_at", "created_at"),
+    ("user", "user__email"),
+    ("tickets", "ticket_count"),
+)
+
+TICKET_COLUMNS = (
+    ("id", "id"),
+    ("order", "order_id"),
+    ("ordered_at", "order__created_at"),
+    ("user", "order__user__email"),
+    ("journey", "journey_id"),
+    ("source", "journey__route__source__name"),
+    ("destination", "journey__route__destination__name"),
+    ("departure_time", "journey__departure_time"),
+    ("train", "journey__train__name"),
+    ("cargo", "cargo"),
+    ("seat", "seat"),
+)
+
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _csv_lines(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _ndjson_lines(header, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+def _chunked(lines, size):
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) == size:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+def export_response(request, name, queryset, columns, file_format):
+    """Stream `columns` of `queryset` as CSV or NDJSON.
+
+    Rows are read through a server-side cursor in batches of
+    EXPORT_CHUNK_SIZE and written out in batches of the same size, so
+    memory does not grow with the number of rows exported, under WSGI
+    and ASGI alike.
+    """
+    if file_format not in CONTENT_TYPES:
+        raise ValidationError(
+            {
+                "file_format": f"Expected one of {', '.join(CONTENT_TYPES)}, "
+                               f"not {file_format}"
+            }
+        )
+
+    header = [column for column, _ in columns]
+    rows = queryset.values_list(
+        *(lookup for _, lookup in columns)
+    ).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    lines = (
+        _csv_lines(header, rows) if file_format == "csv"
+        else _ndjson_lines(header, rows)
+    )
+
+    return StreamingHttpResponse(
+        streaming_content(
+            request, _chunked(lines, settings.EXPORT_CHUNK_SIZE)
+        ),
+        content_type=CONTENT_TYPES[file_format],
+        headers={
+            "Content-Disposition":
+                f'attachment; filename="{name}.{file_format}"'
+        }
+    )
+
+
+def created_between(queryset, field, params):
+    """Filter by ?created_after= and ?created_before= on `field`."""
+    for param, lookup in (
+        ("created_after", "gte"), ("created_before", "lte")
+    ):
+        value = params.get(param)
+        if not value:
+            continue
+        queryset = queryset.filter(
+            **{f"{field}__{lookup}": datetime_param(param, value)}
+        )
+    return queryset
+
+
+def order_export_queryset():
+    return (
+        Order.objects
+        .annotate(ticket_count=Count("tickets"))
+        .order_by("id")
+    )
+
+
+def ticket_export_queryset():
+    return Ticket.objects.order_by("id")
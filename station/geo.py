@@ -0,0 +1,116 @@
+import math
+from array import array
+from heapq import heappush, heappushpop
+from typing import NamedTuple
+
+from station.models import Station
+from station.reloading import ReloadableState
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+class NearbyStation(NamedTuple):
+    station_id: int
+    distance: float
+
+
+def unit_vector(latitude: float, longitude: float) -> tuple:
+    latitude, longitude = math.radians(latitude), math.radians(longitude)
+    return (
+        math.cos(latitude) * math.cos(longitude),
+        math.cos(latitude) * math.sin(longitude),
+        math.sin(latitude),
+    )
+
+
+def chord_to_km(squared_chord: float) -> float:
+    half_chord = min(1.0, math.sqrt(squared_chord) / 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(half_chord)
+
+
+class StationIndex(ReloadableState):
+    """k-d tree of station positions for nearest-station queries.
+
+    Stations are stored as points on the unit sphere, so the straight
+    line distance between two points orders them exactly like the great
+    circle distance and the tree needs no special handling around the
+    poles or the antimeridian. The tree is implicit: points are arranged
+    so that the median of every range is its splitting node. It is
+    rebuilt on the next query after a station changes.
+    """
+
+    max_age_setting = "STATION_INDEX_MAX_AGE"
+
+    def __init__(self):
+        super().__init__()
+        self._ids = array("q")
+        self._points = array("d")
+
+    def _arrange(self, points, start, end, depth):
+        if end - start <= 1:
+            return
+        axis = depth % 3
+        points[start:end] = sorted(
+            points[start:end], key=lambda point: point[1][axis]
+        )
+        middle = (start + end) // 2
+        self._arrange(points, start, middle, depth + 1)
+        self._arrange(points, middle + 1, end, depth + 1)
+
+    def _load(self):
+        points = [
+            (station_id, unit_vector(float(latitude), float(longitude)))
+            for station_id, latitude, longitude in (
+                Station.objects
+                .values_list("id", "latitude", "longitude")
+                .iterator(chunk_size=5000)
+            )
+        ]
+        self._arrange(points, 0, len(points), 0)
+        self._ids = array("q", (station_id for station_id, _ in points))
+        self._points = array(
+            "d", (coordinate for _, point in points for coordinate in point)
+        )
+
+    def _search(self, target, k, start, end, depth, best):
+        if start >= end:
+            return
+        middle = (start + end) // 2
+        offset = middle * 3
+        squared = sum(
+            (self._points[offset + axis] - target[axis]) ** 2
+            for axis in range(3)
+        )
+        if len(best) < k:
+            heappush(best, (-squared, self._ids[middle]))
+        elif squared < -best[0][0]:
+            heappushpop(best, (-squared, self._ids[middle]))
+
+        axis = depth % 3
+        difference = target[axis] - self._points[offset + axis]
+        near, far = (
+            ((start, middle), (middle + 1, end)) if difference < 0
+            else ((middle + 1, end), (start, middle))
+        )
+        self._search(target, k, *near, depth + 1, best)
+        if len(best) < k or difference ** 2 < -best[0][0]:
+            self._search(target, k, *far, depth + 1, best)
+
+    def nearest(self, latitude: float, longitude: float, k: int) -> list:
+        with self._lock:
+            self._ensure_loaded()
+            best = []
+            self._search(
+                unit_vector(latitude, longitude),
+                k, 0, len(self._ids), 0, best
+            )
+
+        return [
+            NearbyStation(station_id, chord_to_km(squared))
+            for squared, station_id in sorted(
+                (-squared, station_id) for squared, station_id in best
+            )
+        ]
+
+
+station_index = StationIndex()
@@ -0,0 +1,274 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import FileUploadHandler
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
+from PIL import Image, ImageOps
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from station.cache import invalidate_namespace
+from station.models import Train
+from train_station import settings
+
+FORMATS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "jpeg": {
+        "format": "JPEG", "quality": 82, "optimize": True, "progressive": True
+    },
+}
+
+MULTIPART_OVERHEAD = 64 * 1024
+UPLOAD_DIRECTORY = "uploads/train"
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_VARIANT_WORKERS,
+    thread_name_prefix="image-variants"
+)
+
+
+class ImageTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = "Image upload is too large."
+    default_code = "image_too_large"
+
+
+class BoundedUploadHandler(FileUploadHandler):
+    """Abort an upload as soon as it is known to exceed `max_size`.
+
+    The declared Content-Length is checked before any of the body is
+    read, and streamed bytes are counted for clients that send less
+    accurate headers. Chunks are passed on to the next handler, which
+    spools them to a temporary file.
+    """
+
+    def __init__(self, request=None, max_size=None):
+        super().__init__(request)
+        self.max_size = max_size or settings.TRAIN_IMAGE_MAX_SIZE
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        if content_length > self.max_size + MULTIPART_OVERHEAD:
+            raise ImageTooLarge()
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > self.max_size:
+            raise ImageTooLarge()
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+def limit_upload_size(request):
+    request.upload_handlers.insert(0, BoundedUploadHandler(request))
+
+
+def validate_image_upload(image):
+    """Check the size and dimensions of an uploaded image.
+
+    Dimensions come from the image header, which the image field has
+    already opened, so no pixel data is decoded here.
+    """
+    if image.size > settings.TRAIN_IMAGE_MAX_SIZE:
+        raise ImageTooLarge()
+
+    width, height = image.image.size
+    max_dimension = settings.TRAIN_IMAGE_MAX_DIMENSION
+    if width > max_dimension or height > max_dimension:
+        raise ValidationError(
+            f"Image is {width}x{height}, "
+            f"at most {max_dimension}x{max_dimension} is allowed"
+        )
+    return image
+
+
+def _variant_name(image_name: str, variant: str, extension: str) -> str:
+    directory, filename = os.path.split(image_name)
+    stem, _ = os.path.splitext(filename)
+    return os.path.join(
+        directory, "variants", f"{stem.rstrip('.')}-{variant}.{extension}"
+    )
+
+
+def _render(image: Image.Image, width: int, options: dict) -> bytes:
+    variant = image.copy()
+    variant.thumbnail((width, width * 4), Image.LANCZOS)
+    output = BytesIO()
+    variant.save(output, **options)
+    return output.getvalue()
+
+
+def _shared_variants(image_name: str):
+    for variants in Train.objects.filter(image=image_name).values_list(
+        "image_variants", flat=True
+    ):
+        if set(variants) == set(settings.TRAIN_IMAGE_VARIANTS):
+            for formats in variants.values():
+                for name in formats.values():
+                    default_storage.touch(name)
+            return variants
+    return None
+
+
+def _render_variants(image_name: str) -> dict:
+    with default_storage.open(image_name, "rb") as image_file:
+        image = ImageOps.exif_transpose(Image.open(image_file))
+        image = image.convert("RGB")
+
+    variants = {}
+    for variant, width in settings.TRAIN_IMAGE_VARIANTS.items():
+        variants[variant] = {}
+        for extension, options in FORMATS.items():
+            variants[variant][extension] = default_storage.save(
+                _variant_name(image_name, variant, extension),
+                ContentFile(_render(image, width, options))
+            )
+    return variants
+
+
+def _store_variants(train_id: int):
+    train = Train.objects.filter(pk=train_id).first()
+    if train is None or not train.image:
+        return
+    image_name = train.image.name
+
+    variants = _shared_variants(image_name)
+    if variants is None:
+        variants = _render_variants(image_name)
+
+    stored = Train.objects.filter(pk=train_id, image=image_name).update(
+        image_variants=variants
+    )
+    if stored:
+        invalidate_namespace("trains")
+
+
+def generate_variants(train_id: int):
+    """Write resized WebP and JPEG copies of a train image.
+
+    Every variant of TRAIN_IMAGE_VARIANTS is bounded by its width and
+    keeps the aspect ratio. Variants already rendered for another train
+    with the same image are reused. The result is only stored if the
+    train still has the same image, so a newer upload is never
+    overwritten.
+    """
+    try:
+        _store_variants(train_id)
+    finally:
+        close_old_connections()
+
+
+def missing_variants() -> list:
+    """Ids of trains with an image but without every configured variant."""
+    return [
+        train_id
+        for train_id, variants in (
+            Train.objects.exclude(image="")
+            .values_list("id", "image_variants")
+            .order_by("id")
+            .iterator()
+        )
+        if set(variants) != set(settings.TRAIN_IMAGE_VARIANTS)
+    ]
+
+
+def render_missing_variants() -> list:
+    """Render variants that the upload worker never stored.
+
+    Rendering is queued in process after the upload commits, so a
+    restart before the job ran leaves the train without variants.
+    Rendering twice is harmless: files are stored by content and the
+    result is only kept while the train has the same image.
+    """
+    train_ids = missing_variants()
+    for train_id in train_ids:
+        _store_variants(train_id)
+    return train_ids
+
+
+def refresh_variants(train: Train):
+    """Drop the variants of a replaced image and render the new ones.
+
+    Rendering runs on a worker thread once the transaction commits, so
+    the upload request does not wait for it. Files of the replaced image
+    may be shared with other trains and are left to `collect_orphans`.
+    """
+    if train.image_variants:
+        Train.objects.filter(pk=train.pk).update(image_variants={})
+        train.image_variants = {}
+    if train.image:
+        transaction.on_commit(
+            lambda: executor.submit(generate_variants, train.pk)
+        )
+
+
+def referenced_media() -> set:
+    names = set()
+    for image, variants in (
+        Train.objects.exclude(image="")
+        .values_list("image", "image_variants")
+        .iterator()
+    ):
+        names.add(image)
+        names.update(
+            name for formats in variants.values() for name in formats.values()
+        )
+    return names
+
+
+def collect_orphans(min_age, dry_run=False) -> list:
+    """Delete stored train images and variants that no train refers to.
+
+    This is the only place stored media is deleted. Files modified less
+    than `min_age` ago are kept, since they may belong to an upload or a
+    variant rendering that has not committed yet; the storage touches a
+    file whenever a new upload reuses it, so reuse restarts that window.
+    """
+    if not default_storage.exists(UPLOAD_DIRECTORY):
+        return []
+
+    referenced = referenced_media()
+    cutoff = timezone.now() - min_age
+    orphans = [
+        name
+        for name in default_storage.walk(UPLOAD_DIRECTORY)
+        if name not in referenced
+        and default_storage.get_modified_time(name) < cutoff
+    ]
+    if not dry_run:
+        for name in orphans:
+            if default_storage.get_modified_time(name) < cutoff:
+                default_storage.delete(name)
+    return orphans
+
+
+def variant_urls(train: Train, request=None) -> dict:
+    urls = {}
+    for variant, formats in train.image_variants.items():
+        urls[variant] = {}
+        for extension, name in formats.items():
+            url = default_storage.url(name)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            urls[variant][extension] = url
+    return urls
+
+
+def serve_media(request, path):
+    """Serve an uploaded file with a long-lived, immutable cache policy.
+
+    Stored names are digests of the file content, so a URL never points
+    at different content and browsers may keep it for MEDIA_MAX_AGE.
+    """
+    response = serve(request, path, document_root=default_storage.location)
+    patch_cache_control(
+        response, public=True, max_age=settings.MEDIA_MAX_AGE, immutable=True
+    )
+    return response
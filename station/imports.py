@@ -0,0 +1,125 @@
+import csv
+import io
+import json
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from station.models import Crew, Journey, Route, Train
+from station.planner import planner
+from station.serializers import JourneyImportRowSerializer
+from train_station import settings
+
+
+def read_rows(file, file_format: str) -> list:
+    """Parse an uploaded CSV or JSON timetable into a list of row dicts.
+
+    CSV needs a header row with route, train, departure_time,
+    arrival_time and an optional crew column of ids separated by commas
+    or semicolons; JSON is a list of objects with the same keys.
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig")
+    try:
+        if file_format == "csv":
+            return list(csv.DictReader(text))
+        if file_format == "json":
+            rows = json.load(text)
+            if isinstance(rows, list):
+                return rows
+            raise ValidationError({"file": "Expected a list of journeys"})
+    except (UnicodeDecodeError, ValueError, csv.Error) as error:
+        raise ValidationError({"file": f"Cannot parse {file_format}: {error}"})
+    finally:
+        text.detach()
+
+    raise ValidationError(
+        {"file_format": f"Expected csv or json, not {file_format}"}
+    )
+
+
+class JourneyImporter:
+    """Validate a timetable as a whole, then insert it in batches.
+
+    Routes, trains and crews of all rows are checked with one query per
+    model. Nothing is written unless every row is valid; otherwise
+    `errors` lists the problems by 1-based row number.
+    """
+
+    def __init__(self, batch_size=None):
+        self.batch_size = batch_size or settings.JOURNEY_IMPORT_BATCH_SIZE
+        self.errors = []
+
+    @staticmethod
+    def _existing(model, ids) -> set:
+        return set(
+            model.objects.filter(id__in=ids).values_list("id", flat=True)
+        )
+
+    def validate(self, rows) -> list:
+        self.errors = []
+        valid = []
+        for number, row in enumerate(rows, start=1):
+            serializer = JourneyImportRowSerializer(data=row)
+            if serializer.is_valid():
+                valid.append((number, serializer.validated_data))
+            else:
+                self.errors.append(
+                    {"row": number, "errors": serializer.errors}
+                )
+
+        routes = self._existing(Route, {data["route"] for _, data in valid})
+        trains = self._existing(Train, {data["train"] for _, data in valid})
+        crews = self._existing(
+            Crew, {crew for _, data in valid for crew in data["crew"]}
+        )
+
+        journeys = []
+        for number, data in valid:
+            errors = {}
+            if data["route"] not in routes:
+                errors["route"] = [f"Unknown route {data['route']}"]
+            if data["train"] not in trains:
+                errors["train"] = [f"Unknown train {data['train']}"]
+            unknown_crew = sorted(set(data["crew"]) - crews)
+            if unknown_crew:
+                errors["crew"] = [
+                    f"Unknown crew {crew}" for crew in unknown_crew
+                ]
+            if errors:
+                self.errors.append({"row": number, "errors": errors})
+            else:
+                journeys.append(data)
+
+        self.errors.sort(key=lambda error: error["row"])
+        return journeys
+
+    def _insert(self, batch):
+        journeys = Journey.objects.bulk_create(
+            Journey(
+                route_id=data["route"],
+                train_id=data["train"],
+                departure_time=data["departure_time"],
+                arrival_time=data["arrival_time"]
+            )
+            for data in batch
+        )
+        Journey.crew.through.objects.bulk_create(
+            Journey.crew.through(journey_id=journey.id, crew_id=crew)
+            for journey, data in zip(journeys, batch)
+            for crew in dict.fromkeys(data["crew"])
+        )
+        return len(journeys)
+
+    def run(self, rows) -> int:
+        journeys = self.validate(rows)
+        if self.errors:
+            return 0
+
+        created = 0
+        with transaction.atomic():
+            for start in range(0, len(journeys), self.batch_size):
+                created += self._insert(
+                    journeys[start:start + self.batch_size]
+                )
+            transaction.on_commit(planner.invalidate)
+        return created
@@ -0,0 +1,247 @@
+import random
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from station.models import (
+    Crew,
+    Journey,
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType
+)
+from station.occupancy import SeatMap
+
+
+class LoadGenerator:
+    """Bulk insert a synthetic timetable with sold tickets.
+
+    Journeys are written in batches of `batch_size` together with their
+    crew, orders and tickets, so memory stays flat however many rows are
+    generated. A `hot_share` fraction of journeys is filled to
+    `hot_occupancy`, the rest to a uniform share around `occupancy`.
+    """
+
+    def __init__(self, prefix="Load", seed=0, batch_size=5000):
+        self.prefix = prefix
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.counts = {}
+
+    def _count(self, name, rows):
+        self.counts[name] = self.counts.get(name, 0) + len(rows)
+        return rows
+
+    def create_customers(self, count):
+        password = make_password(None)
+        return self._count("customers", get_user_model().objects.bulk_create(
+            (
+                get_user_model()(
+                    email=f"{self.prefix.lower()}-{index}@example.com",
+                    password=password
+                )
+                for index in range(count)
+            ),
+            batch_size=self.batch_size
+        ))
+
+    def create_stations(self, count):
+        return self._count("stations", Station.objects.bulk_create(
+            (
+                Station(
+                    name=f"{self.prefix} Station {index}",
+                    latitude=round(self.rng.uniform(44, 52), 2),
+                    longitude=round(self.rng.uniform(22, 40), 2)
+                )
+                for index in range(count)
+            ),
+            batch_size=self.batch_size
+        ))
+
+    def create_routes(self, count, stations):
+        return self._count("routes", Route.objects.bulk_create(
+            (
+                Route(
+                    source=source,
+                    destination=destination,
+                    distance=self.rng.randint(50, 900)
+                )
+                for source, destination in (
+                    self.rng.sample(stations, 2) for _ in range(count)
+                )
+            ),
+            batch_size=self.batch_size
+        ))
+
+    def create_trains(self, count, cargo_num, places_in_cargo):
+        train_type, _ = TrainType.objects.get_or_create(
+            name=f"{self.prefix} Intercity"
+        )
+        return self._count("trains", Train.objects.bulk_create(
+            (
+                Train(
+                    name=f"{self.prefix} Train {index}",
+                    cargo_num=cargo_num,
+                    places_in_cargo=places_in_cargo,
+                    train_type=train_type
+                )
+                for index in range(count)
+            ),
+            batch_size=self.batch_size
+        ))
+
+    def create_crews(self, count):
+        return self._count("crews", Crew.objects.bulk_create(
+            (
+                Crew(first_name=f"First {index}", last_name=f"Last {index}")
+                for index in range(count)
+            ),
+            batch_size=self.batch_size
+        ))
+
+    def _fill(self, occupancy, hot_share, hot_occupancy):
+        if self.rng.random() < hot_share:
+            return hot_occupancy
+        return self.rng.uniform(0, min(1, 2 * occupancy))
+
+    def create_journeys(
+        self,
+        count,
+        routes,
+        trains,
+        crews,
+        customers,
+        start,
+        days=90,
+        crew_per_journey=2,
+        occupancy=0.3,
+        hot_share=0.05,
+        hot_occupancy=0.9,
+        max_party=4
+    ):
+        trains_by_id = {train.id: train for train in trains}
+        for batch_start in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - batch_start)
+            journeys = self._build_journeys(size, routes, trains, start, days)
+            parties = []
+            for journey in journeys:
+                parties.extend(
+                    self._sell_seats(
+                        journey,
+                        trains_by_id[journey.train_id],
+                        self._fill(occupancy, hot_share, hot_occupancy),
+                        max_party
+                    )
+                )
+
+            with transaction.atomic():
+                self._count("journeys", Journey.objects.bulk_create(journeys))
+                self._create_journey_crew(journeys, crews, crew_per_journey)
+                self._create_orders(parties, customers)
+
+    def _build_journeys(self, size, routes, trains, start, days):
+        journeys = []
+        for _ in range(size):
+            departure = start + timedelta(
+                minutes=self.rng.randrange(0, 60 * 24 * days)
+            )
+            journeys.append(
+                Journey(
+                    route=self.rng.choice(routes),
+                    train=self.rng.choice(trains),
+                    departure_time=departure,
+                    arrival_time=departure + timedelta(
+                        minutes=self.rng.randint(30, 12 * 60)
+                    )
+                )
+            )
+        return journeys
+
+    def _sell_seats(self, journey, train, fill, max_party):
+        seat_map = SeatMap(train.cargo_num, train.places_in_cargo)
+        sold = int(seat_map.capacity * fill)
+        positions = sorted(self.rng.sample(range(seat_map.capacity), sold))
+
+        parties = []
+        index = 0
+        while index < len(positions):
+            party = positions[index:index + self.rng.randint(1, max_party)]
+            index += len(party)
+            seats = [
+                divmod(position, train.places_in_cargo) for position in party
+            ]
+            seats = [(cargo + 1, seat + 1) for cargo, seat in seats]
+            for cargo, seat in seats:
+                seat_map.take(cargo, seat)
+            parties.append((journey, seats))
+
+        journey.occupancy = seat_map.to_bytes()
+        journey.tickets_sold = sold
+        return parties
+
+    def _create_journey_crew(self, journeys, crews, crew_per_journey):
+        crew_through = Journey.crew.through
+        self._count("journey crew", crew_through.objects.bulk_create(
+            [
+                crew_through(journey_id=journey.id, crew_id=crew.id)
+                for journey in journeys
+                for crew in self.rng.sample(crews, crew_per_journey)
+            ],
+            batch_size=self.batch_size
+        ))
+
+    def _create_orders(self, parties, customers):
+        orders = self._count("orders", Order.objects.bulk_create(
+            [Order(user=self.rng.choice(customers)) for _ in parties],
+            batch_size=self.batch_size
+        ))
+        self._count("tickets", Ticket.objects.bulk_create(
+            [
+                Ticket(cargo=cargo, seat=seat, journey=journey, order=order)
+                for order, (journey, seats) in zip(orders, parties)
+                for cargo, seat in seats
+            ],
+            batch_size=self.batch_size
+        ))
+
+    def run(
+        self,
+        stations=500,
+        routes=5000,
+        trains=300,
+        crews=2000,
+        customers=10000,
+        journeys=100000,
+        cargo_num=10,
+        places_in_cargo=50,
+        start=None,
+        **journey_options
+    ):
+        if start is None:
+            start = timezone.now().replace(
+                hour=0, minute=0, second=0, microsecond=0
+            )
+        if isinstance(start, datetime) and timezone.is_naive(start):
+            start = timezone.make_aware(start)
+
+        customer_objects = self.create_customers(customers)
+        station_objects = self.create_stations(stations)
+        route_objects = self.create_routes(routes, station_objects)
+        train_objects = self.create_trains(trains, cargo_num, places_in_cargo)
+        crew_objects = self.create_crews(crews)
+        self.create_journeys(
+            journeys,
+            route_objects,
+            train_objects,
+            crew_objects,
+            customer_objects,
+            start,
+            **journey_options
+        )
+        return self.counts
@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.core.management import BaseCommand
+
+from station.images import collect_orphans
+
+
+class Command(BaseCommand):
+    help = "Delete stored train images and variants no train refers to."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=60,
+            help="Keep files modified less than this many minutes ago."
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List orphaned files without deleting them."
+        )
+
+    def handle(self, *args, **options):
+        orphans = collect_orphans(
+            timedelta(minutes=options["min_age"]),
+            dry_run=options["dry_run"]
+        )
+        for name in orphans:
+            self.stdout.write(name)
+        verb = "Found" if options["dry_run"] else "Deleted"
+        self.stdout.write(f"{verb} {len(orphans)} orphaned media files")
@@ -0,0 +1,33 @@
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from station.models import SeatHold
+
+
+class Command(BaseCommand):
+    help = "Delete expired seat holds in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of holds deleted per query."
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        expired = SeatHold.objects.filter(expires_at__lte=now).order_by(
+            "expires_at"
+        )
+
+        deleted = 0
+        while True:
+            batch = list(
+                expired.values_list("pk", flat=True)[:options["batch_size"]]
+            )
+            if not batch:
+                break
+            deleted += SeatHold.objects.filter(pk__in=batch).delete()[0]
+
+        self.stdout.write(f"{deleted} expired seat holds deleted.")
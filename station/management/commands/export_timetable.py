@@ -0,0 +1,24 @@
+from django.core.management import BaseCommand
+
+from station.timetable import TimetableSnapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Regenerate the timetable snapshot partitions of days whose "
+        "journeys changed since the last run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Rewrite every partition."
+        )
+
+    def handle(self, *args, **options):
+        stats = TimetableSnapshot().build(full=options["full"])
+        self.stdout.write(
+            f"Timetable snapshot has {stats['partitions']} partitions, "
+            f"{stats['written']} written, {stats['removed']} removed"
+        )
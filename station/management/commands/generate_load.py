@@ -0,0 +1,102 @@
+import time
+
+from django.core.management import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from station.loadgen import LoadGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with a synthetic timetable, orders and tickets "
+        "for benchmarking."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stations", type=int, default=500)
+        parser.add_argument("--routes", type=int, default=5000)
+        parser.add_argument("--trains", type=int, default=300)
+        parser.add_argument("--crews", type=int, default=2000)
+        parser.add_argument("--customers", type=int, default=10000)
+        parser.add_argument("--journeys", type=int, default=100000)
+        parser.add_argument("--cargo-num", type=int, default=10)
+        parser.add_argument("--places-in-cargo", type=int, default=50)
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=90,
+            help="Spread departures over this many days."
+        )
+        parser.add_argument(
+            "--start",
+            help="First departure day (ISO 8601), defaults to today."
+        )
+        parser.add_argument(
+            "--occupancy",
+            type=float,
+            default=0.3,
+            help="Average share of sold seats on ordinary journeys."
+        )
+        parser.add_argument(
+            "--hot-share",
+            type=float,
+            default=0.05,
+            help="Share of journeys filled to --hot-occupancy."
+        )
+        parser.add_argument("--hot-occupancy", type=float, default=0.9)
+        parser.add_argument(
+            "--max-party",
+            type=int,
+            default=4,
+            help="Largest number of tickets in one order."
+        )
+        parser.add_argument(
+            "--prefix",
+            default="Load",
+            help="Prefix of generated names, must differ between runs."
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        start = None
+        if options["start"]:
+            try:
+                start = parse_datetime(options["start"])
+            except ValueError:
+                start = None
+            if start is None:
+                raise CommandError(
+                    f"Expected ISO 8601 date and time for --start, "
+                    f"not {options['start']}"
+                )
+
+        started = time.monotonic()
+        generator = LoadGenerator(
+            prefix=options["prefix"],
+            seed=options["seed"],
+            batch_size=options["batch_size"]
+        )
+        counts = generator.run(
+            stations=options["stations"],
+            routes=options["routes"],
+            trains=options["trains"],
+            crews=options["crews"],
+            customers=options["customers"],
+            journeys=options["journeys"],
+            cargo_num=options["cargo_num"],
+            places_in_cargo=options["places_in_cargo"],
+            start=start,
+            days=options["days"],
+            occupancy=options["occupancy"],
+            hot_share=options["hot_share"],
+            hot_occupancy=options["hot_occupancy"],
+            max_party=options["max_party"]
+        )
+
+        for name, count in counts.items():
+            self.stdout.write(f"{name}: {count}")
+        self.stdout.write(
+            f"Generated {sum(counts.values())} rows "
+            f"in {time.monotonic() - started:.1f}s"
+        )
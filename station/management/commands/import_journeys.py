@@ -0,0 +1,46 @@
+import os
+
+from django.core.management import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from station.imports import JourneyImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = "Import journeys in bulk from a CSV or JSON timetable file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSON file to import.")
+        parser.add_argument(
+            "--file-format",
+            choices=("csv", "json"),
+            help="Defaults to the file extension."
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Number of journeys inserted per query."
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["file_format"] or (
+            os.path.splitext(path)[1].lstrip(".").lower()
+        )
+
+        try:
+            with open(path, "rb") as timetable:
+                rows = read_rows(timetable, file_format)
+        except (OSError, ValidationError) as error:
+            raise CommandError(error)
+
+        importer = JourneyImporter(batch_size=options["batch_size"])
+        created = importer.run(rows)
+        for error in importer.errors:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        if importer.errors:
+            raise CommandError(
+                f"{len(importer.errors)} invalid rows, nothing imported."
+            )
+
+        self.stdout.write(f"{created} journeys imported.")
@@ -0,0 +1,67 @@
+from itertools import islice
+
+from django.core.management import BaseCommand
+
+from station.models import Journey, Ticket
+from station.occupancy import SeatMap
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = "Recount sold tickets and seat occupancy of every journey."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report drifted journeys without fixing them."
+        )
+
+    def _ticket_seat_maps(self, journeys):
+        """Seat maps of `journeys` built from their ticket rows."""
+        seat_maps = {
+            journey.id: SeatMap(
+                journey.train.cargo_num, journey.train.places_in_cargo
+            )
+            for journey in journeys
+        }
+        tickets = Ticket.objects.filter(
+            journey_id__in=seat_maps
+        ).values_list("journey_id", "cargo", "seat")
+        for journey_id, cargo, seat in tickets.iterator(chunk_size=5000):
+            # Tickets left outside a train shrunk after they were sold
+            # hold no seat in the occupancy bitmap.
+            try:
+                seat_maps[journey_id].take(cargo, seat)
+            except ValueError:
+                continue
+        return seat_maps
+
+    def handle(self, *args, **options):
+        drifted = 0
+        journeys = (
+            Journey.objects.select_related("train").order_by("id")
+            .iterator(chunk_size=BATCH_SIZE)
+        )
+        while batch := list(islice(journeys, BATCH_SIZE)):
+            seat_maps = self._ticket_seat_maps(batch)
+            for journey in batch:
+                expected = seat_maps[journey.id]
+                if (
+                    journey.tickets_sold == expected.count()
+                    and journey.seat_map.to_bytes() == expected.to_bytes()
+                ):
+                    continue
+
+                drifted += 1
+                self.stdout.write(
+                    f"Journey {journey.id}: counted {journey.tickets_sold}, "
+                    f"actual {expected.count()}, taken seats "
+                    f"{journey.seat_map.taken_seats()}, "
+                    f"actual {expected.taken_seats()}"
+                )
+                if not options["dry_run"]:
+                    journey.rebuild_occupancy()
+
+        self.stdout.write(f"{drifted} journeys drifted.")
@@ -0,0 +1,27 @@
+from django.core.management import BaseCommand
+
+from station.images import missing_variants, render_missing_variants
+
+
+class Command(BaseCommand):
+    help = "Render image variants of trains that are missing them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List trains missing variants without rendering them."
+        )
+
+    def handle(self, *args, **options):
+        if options["dry_run"]:
+            train_ids = missing_variants()
+        else:
+            train_ids = render_missing_variants()
+        for train_id in train_ids:
+            self.stdout.write(f"Train {train_id}")
+        if options["dry_run"]:
+            summary = f"Found {len(train_ids)} trains missing variants"
+        else:
+            summary = f"Rendered variants of {len(train_ids)} trains"
+        self.stdout.write(summary)
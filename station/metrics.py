@@ -0,0 +1,212 @@
+import bisect
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import HttpResponse, HttpResponseForbidden
+
+from train_station import settings
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+
+
+def _format_labels(names, values) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"')
+        )
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class BucketCounts:
+    """Number of observed values at or below each bucket bound, and sum.
+
+    The last count is the +Inf bucket. Callers serialise access.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    def count(self) -> int:
+        return sum(self.counts)
+
+
+class Metric(ABC):
+    type = None
+
+    def __init__(self, name: str, documentation: str, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self._values = {}
+
+    @abstractmethod
+    def samples(self):
+        """Yield (sample name, label names, label values, value)."""
+
+    def expose(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        lines.extend(
+            f"{name}{_format_labels(label_names, label_values)} {value}"
+            for name, label_names, label_values, value in self.samples()
+        )
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = (
+                self._values.get(label_values, 0) + amount
+            )
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            yield f"{self.name}_total", self.labels, label_values, value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=()):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            counts = self._values.get(label_values)
+            if counts is None:
+                counts = self._values[label_values] = BucketCounts(
+                    self.buckets
+                )
+            counts.observe(value)
+
+    def count(self, *label_values):
+        counts = self._values.get(label_values)
+        return 0 if counts is None else counts.count()
+
+    def samples(self):
+        with self._lock:
+            values = sorted(
+                (label_values, (list(counts.counts), counts.total))
+                for label_values, counts in self._values.items()
+            )
+        bucket_labels = self.labels + ("le",)
+        for label_values, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                yield (
+                    f"{self.name}_bucket",
+                    bucket_labels,
+                    label_values + (bound,),
+                    cumulative
+                )
+            yield f"{self.name}_sum", self.labels, label_values, total
+            yield f"{self.name}_count", self.labels, label_values, cumulative
+
+
+orders_created = Counter(
+    "station_orders_created",
+    "Orders committed, by the endpoint that created them.",
+    labels=("source",)
+)
+seat_conflicts = Counter(
+    "station_seat_conflicts",
+    "Bookings rejected because a seat was taken or held.",
+    labels=("reason",)
+)
+throttled_requests = Counter(
+    "station_throttled_requests",
+    "Requests rejected with 429 Too Many Requests.",
+    labels=("method", "view")
+)
+request_latency = Histogram(
+    "station_request_duration_seconds",
+    "Latency of station API requests.",
+    labels=("method", "view"),
+    buckets=LATENCY_BUCKETS
+)
+
+REGISTRY = (
+    orders_created,
+    seat_conflicts,
+    throttled_requests,
+    request_latency
+)
+
+
+def expose() -> str:
+    return "\n".join(metric.expose() for metric in REGISTRY) + "\n"
+
+
+class MetricsMiddleware:
+    """Count throttled requests and time every view of `station.urls`."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self._record(request, response, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self._record(request, response, time.perf_counter() - started)
+        return response
+
+    @staticmethod
+    def _record(request, response, duration):
+        match = request.resolver_match
+        if match is not None and match.app_name == "station":
+            request_latency.observe(duration, request.method, match.view_name)
+            if response.status_code == 429:
+                throttled_requests.inc(request.method, match.view_name)
+
+
+def metrics_view(request):
+    """Text exposition of REGISTRY for scrapers in `METRICS_ALLOWED_IPS`."""
+    if request.META.get("REMOTE_ADDR") not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        expose(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.7 on 2026-10-18 03:29
+
+from django.db import migrations, models
+
+from station.occupancy import SeatMap
+
+
+def fill_occupancy(apps, schema_editor):
+    Journey = apps.get_model("station", "Journey")
+    Ticket = apps.get_model("station", "Ticket")
+
+    journeys = Journey.objects.select_related("train")
+    for journey in journeys.iterator():
+        seat_map = SeatMap(
+            journey.train.cargo_num,
+            journey.train.places_in_cargo
+        )
+        tickets = Ticket.objects.filter(journey=journey)
+        for cargo, seat in tickets.values_list("cargo", "seat"):
+            try:
+                seat_map.take(cargo, seat)
+            except ValueError:
+                continue
+        journey.occupancy = seat_map.to_bytes()
+        journey.save(update_fields=["occupancy"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('station', '0007_train_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='journey',
+            name='occupancy',
+            field=models.BinaryField(default=bytes),
+        ),
+        migrations.RunPython(fill_occupancy, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.7 on 2026-10-18 03:30
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_tickets_sold(apps, schema_editor):
+    Journey = apps.get_model("station", "Journey")
+    Ticket = apps.get_model("station", "Ticket")
+
+    sold = (
+        Ticket.objects
+        .values("journey")
+        .annotate(sold=Count("id"))
+        .values_list("journey", "sold")
+    )
+    for journey_id, tickets_sold in sold:
+        Journey.objects.filter(pk=journey_id).update(
+            tickets_sold=tickets_sold
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('station', '0008_journey_occupancy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='journey',
+            name='tickets_sold',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_tickets_sold, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.7 on 2026-10-18 03:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('station', '0009_journey_tickets_sold'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='journey',
+            index=models.Index(fields=['route', 'departure_time'], name='station_jou_route_i_d72ab9_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-18 03:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('station', '0011_order_user_created_at_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='journey',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
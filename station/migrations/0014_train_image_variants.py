@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-18 04:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('station', '0013_seathold'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='train',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -1,11 +1,15 @@
 import os
 import uuid
 
-from django.db import models
-from django.db.models import UniqueConstraint
+from django.db import models, transaction
+from django.db.models import F, Q, UniqueConstraint
+from django.utils import timezone
 from django.utils.text import slugify
 from rest_framework.exceptions import ValidationError
 
+from station.events import seat_events
+from station.metrics import seat_conflicts
+from station.occupancy import SeatMap
 from train_station import settings
 
 
@@ -42,6 +46,9 @@ class Order(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["user", "-created_at", "-id"])
+        ]
 
 
 class TrainType(models.Model):
@@ -65,6 +72,18 @@ class Train(models.Model):
     places_in_cargo = models.IntegerField()
     train_type = models.ForeignKey(TrainType, on_delete=models.CASCADE)
     image = models.ImageField(upload_to=train_image_path, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._seat_layout = instance.seat_layout
+        instance._image_name = instance.image.name
+        return instance
+
+    @property
+    def seat_layout(self):
+        return self.cargo_num, self.places_in_cargo
 
     def __str__(self):
         return self.name
@@ -117,12 +136,190 @@ class Journey(models.Model):
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
     crew = models.ManyToManyField(Crew, related_name="journeys")
+    occupancy = models.BinaryField(default=bytes)
+    tickets_sold = models.PositiveIntegerField(default=0)
+    version = models.PositiveIntegerField(default=0)
 
     class Meta:
         indexes = [
-            models.Index(fields=["departure_time", "arrival_time"])
+            models.Index(fields=["departure_time", "arrival_time"]),
+            models.Index(fields=["route", "departure_time"])
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._train_id = instance.train_id
+        return instance
+
+    @property
+    def seat_map(self) -> SeatMap:
+        return SeatMap(
+            self.train.cargo_num,
+            self.train.places_in_cargo,
+            self.occupancy
+        )
+
+    @property
+    def tickets_available(self) -> int:
+        return (
+            self.train.cargo_num * self.train.places_in_cargo
+            - self.tickets_sold
+        )
+
+    def _store_seat_map(self, seat_map: SeatMap):
+        self.occupancy = seat_map.to_bytes()
+        self.tickets_sold = seat_map.count()
+        Journey.objects.filter(pk=self.pk).update(
+            occupancy=self.occupancy,
+            tickets_sold=self.tickets_sold,
+            version=F("version") + 1
+        )
+
+    @staticmethod
+    def _locked(journey_id: int):
+        return (
+            Journey.objects
+            .select_for_update(of=("self",))
+            .select_related("train")
+            .get(pk=journey_id)
+        )
+
+    @staticmethod
+    def book_seats(journey_id: int, seats, user=None):
+        with transaction.atomic():
+            journey = Journey._locked(journey_id)
+            seat_map = journey.seat_map
+            held = set()
+            if user is not None:
+                held = SeatHold.held_seats([journey_id], exclude_user=user)
+            conflicts = [
+                (cargo, seat) for cargo, seat in seats
+                if seat_map.is_taken(cargo, seat)
+                or (journey_id, cargo, seat) in held
+            ]
+            if conflicts:
+                seat_conflicts.inc("seat_taken")
+                raise ValidationError(
+                    {
+                        "seat": [
+                            f"Seat {seat} in cargo {cargo} is already taken"
+                            for cargo, seat in conflicts
+                        ]
+                    }
+                )
+            journey._take_seats(seat_map, seats, user)
+
+    @staticmethod
+    def allocate_seats(journey_id: int, count: int, user=None) -> list:
+        with transaction.atomic():
+            journey = Journey._locked(journey_id)
+            seat_map = journey.seat_map
+            held = SeatHold.held_seats([journey_id], exclude_user=user)
+            seats = seat_map.find_free_seats(
+                count,
+                unavailable={(cargo, seat) for _, cargo, seat in held}
+            )
+            if seats is None:
+                raise ValidationError(
+                    {"party_size": f"Not enough free seats for {count}"}
+                )
+
+            journey._take_seats(seat_map, seats, user)
+            return seats
+
+    def _publish_seats(self, event: str, seats):
+        seats = list(seats)
+        transaction.on_commit(
+            lambda: seat_events.publish(self.id, event, seats)
+        )
+
+    def _take_seats(self, seat_map: SeatMap, seats, user=None):
+        for cargo, seat in seats:
+            seat_map.take(cargo, seat)
+        self._store_seat_map(seat_map)
+        self._publish_seats("taken", seats)
+
+        if user is not None:
+            SeatHold.objects.filter(
+                SeatHold.matching(seats),
+                journey_id=self.id,
+                user=user
+            ).delete()
+
+    @staticmethod
+    def release_seats(journey_id: int, seats):
+        with transaction.atomic():
+            try:
+                journey = Journey._locked(journey_id)
+            except Journey.DoesNotExist:
+                return
+            seat_map = journey.seat_map
+            for cargo, seat in seats:
+                try:
+                    seat_map.release(cargo, seat)
+                except ValueError:
+                    continue
+            journey._store_seat_map(seat_map)
+            journey._publish_seats("released", seats)
+
+    def ticket_seat_map(self) -> SeatMap:
+        """Seat map of the sold tickets that fit the current train."""
+        seat_map = SeatMap(self.train.cargo_num, self.train.places_in_cargo)
+        for cargo, seat in self.tickets.values_list("cargo", "seat"):
+            try:
+                seat_map.take(cargo, seat)
+            except ValueError:
+                continue
+        return seat_map
+
+    def rebuild_occupancy(self):
+        with transaction.atomic():
+            journey = Journey._locked(self.pk)
+            seat_map = journey.ticket_seat_map()
+            journey._store_seat_map(seat_map)
+            journey._publish_seats(
+                "snapshot",
+                (
+                    (cargo, seat)
+                    for cargo, seats in seat_map.taken_seats().items()
+                    for seat in seats
+                )
+            )
+        self.occupancy = journey.occupancy
+        self.tickets_sold = journey.tickets_sold
+
+    def save(
+        self,
+        force_insert=False,
+        force_update=False,
+        using=None,
+        update_fields=None
+    ):
+        bump_version = not self._state.adding
+        if bump_version:
+            self.version = F("version") + 1
+            if update_fields is None:
+                # Occupancy is only written by _store_seat_map under the
+                # row lock, a stale instance must not overwrite it.
+                update_fields = {
+                    field.attname
+                    for field in self._meta.concrete_fields
+                    if not field.primary_key
+                } - self.get_deferred_fields() - {
+                    "occupancy", "tickets_sold"
+                }
+            update_fields = {*update_fields, "version"}
+
+        super(Journey, self).save(
+            force_insert,
+            force_update,
+            using,
+            update_fields
+        )
+        if bump_version:
+            self.refresh_from_db(using=using, fields=["version"])
+
     def __str__(self):
         return (f"Journey from {self.route.source.name} "
                 f"to {self.route.destination.name} "
@@ -172,11 +369,21 @@ class Ticket(models.Model):
                 }
             )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._booked_seat = (
+            instance.journey_id,
+            instance.cargo,
+            instance.seat
+        )
+        return instance
+
     def clean(self):
         Ticket.validate_ticket(self.seat,
                                self.journey.train.places_in_cargo,
                                self.cargo,
-                               self.journey.train.places_in_cargo)
+                               self.journey.train.cargo_num)
 
     def save(
         self,
@@ -186,12 +393,112 @@ class Ticket(models.Model):
         update_fields=None
     ):
         self.full_clean()
-        return super(Ticket, self).save(
-            force_insert,
-            force_update,
-            using,
-            update_fields
-        )
+        with transaction.atomic(using=using):
+            return super(Ticket, self).save(
+                force_insert,
+                force_update,
+                using,
+                update_fields
+            )
 
     def __str__(self):
         return f"cargo: {self.cargo}, seat: {self.seat}"
+
+
+class SeatHold(models.Model):
+    journey = models.ForeignKey(
+        Journey,
+        on_delete=models.CASCADE,
+        related_name="holds"
+    )
+    cargo = models.IntegerField()
+    seat = models.IntegerField()
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="seat_holds"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=["journey", "cargo", "seat"],
+                name="unique_seat_hold"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["expires_at"])
+        ]
+        ordering = ["cargo", "seat"]
+
+    @staticmethod
+    def matching(seats) -> Q:
+        condition = Q(pk__in=[])
+        for cargo, seat in seats:
+            condition |= Q(cargo=cargo, seat=seat)
+        return condition
+
+    @staticmethod
+    def held_seats(journey_ids, exclude_user=None) -> set:
+        holds = SeatHold.objects.filter(
+            journey_id__in=journey_ids,
+            expires_at__gt=timezone.now()
+        )
+        if exclude_user is not None:
+            holds = holds.exclude(user=exclude_user)
+        return set(holds.values_list("journey_id", "cargo", "seat"))
+
+    @staticmethod
+    def place(journey_id: int, user, seats):
+        with transaction.atomic():
+            journey = Journey._locked(journey_id)
+            seat_map = journey.seat_map
+            held = SeatHold.held_seats([journey_id], exclude_user=user)
+            conflicts = [
+                (cargo, seat) for cargo, seat in seats
+                if seat_map.is_taken(cargo, seat)
+                or (journey_id, cargo, seat) in held
+            ]
+            if conflicts:
+                raise ValidationError(
+                    {
+                        "seats": [
+                            f"Seat {seat} in cargo {cargo} is not available"
+                            for cargo, seat in conflicts
+                        ]
+                    }
+                )
+
+            now = timezone.now()
+            SeatHold.objects.filter(
+                SeatHold.matching(seats),
+                journey_id=journey_id,
+                expires_at__lte=now
+            ).delete()
+            SeatHold.objects.bulk_create(
+                [
+                    SeatHold(
+                        journey_id=journey_id,
+                        cargo=cargo,
+                        seat=seat,
+                        user=user,
+                        expires_at=now + settings.SEAT_HOLD_TTL
+                    )
+                    for cargo, seat in seats
+                ],
+                update_conflicts=True,
+                unique_fields=["journey", "cargo", "seat"],
+                update_fields=["expires_at"]
+            )
+
+        return SeatHold.objects.filter(
+            SeatHold.matching(seats),
+            journey_id=journey_id,
+            user=user
+        )
+
+    def __str__(self):
+        return (f"cargo: {self.cargo}, seat: {self.seat} "
+                f"until {self.expires_at}")
@@ -0,0 +1,96 @@
+class SeatMap:
+    """Bitmap of taken seats, one bit per (cargo, seat) pair of a train."""
+
+    def __init__(self, cargo_num: int, places_in_cargo: int, data=b""):
+        self.cargo_num = cargo_num
+        self.places_in_cargo = places_in_cargo
+        size = (cargo_num * places_in_cargo + 7) // 8
+        self._bits = bytearray(bytes(data or b"")[:size]).ljust(size, b"\0")
+
+    def _position(self, cargo: int, seat: int) -> int:
+        if not (
+            1 <= cargo <= self.cargo_num
+            and 1 <= seat <= self.places_in_cargo
+        ):
+            raise ValueError(f"No seat {seat} in cargo {cargo}")
+        return (cargo - 1) * self.places_in_cargo + seat - 1
+
+    def is_taken(self, cargo: int, seat: int) -> bool:
+        position = self._position(cargo, seat)
+        return bool(self._bits[position >> 3] & (1 << (position & 7)))
+
+    def take(self, cargo: int, seat: int) -> None:
+        position = self._position(cargo, seat)
+        self._bits[position >> 3] |= 1 << (position & 7)
+
+    def release(self, cargo: int, seat: int) -> None:
+        position = self._position(cargo, seat)
+        self._bits[position >> 3] &= ~(1 << (position & 7))
+
+    @property
+    def capacity(self) -> int:
+        return self.cargo_num * self.places_in_cargo
+
+    def count(self) -> int:
+        return int.from_bytes(self._bits, "little").bit_count()
+
+    def taken_seats(self) -> dict:
+        taken_seats = {}
+        for byte_index, byte in enumerate(self._bits):
+            if not byte:
+                continue
+            for bit in range(8):
+                if byte & (1 << bit):
+                    position = byte_index * 8 + bit
+                    cargo, seat = divmod(position, self.places_in_cargo)
+                    taken_seats.setdefault(cargo + 1, []).append(seat + 1)
+
+        return taken_seats
+
+    def free_seats(self, cargo: int, unavailable=frozenset()) -> list:
+        return [
+            seat for seat in range(1, self.places_in_cargo + 1)
+            if not self.is_taken(cargo, seat)
+            and (cargo, seat) not in unavailable
+        ]
+
+    def find_free_seats(self, count: int, unavailable=frozenset()):
+        """Pick `count` free seats, keeping a party as close as possible.
+
+        Prefers adjacent seats in one cargo, then any seats in one cargo,
+        then the emptiest cargos first. Returns None if the train does not
+        have enough free seats.
+        """
+        free = {
+            cargo: self.free_seats(cargo, unavailable)
+            for cargo in range(1, self.cargo_num + 1)
+        }
+
+        for cargo, seats in free.items():
+            run_start = 0
+            for index in range(1, len(seats) + 1):
+                if index - run_start == count:
+                    return [(cargo, seat) for seat in seats[run_start:index]]
+                if index < len(seats) and seats[index] != seats[index - 1] + 1:
+                    run_start = index
+
+        for cargo, seats in free.items():
+            if len(seats) >= count:
+                return [(cargo, seat) for seat in seats[:count]]
+
+        if sum(len(seats) for seats in free.values()) < count:
+            return None
+
+        chosen = []
+        for cargo, seats in sorted(
+            free.items(), key=lambda item: len(item[1]), reverse=True
+        ):
+            chosen.extend(
+                (cargo, seat) for seat in seats[:count - len(chosen)]
+            )
+            if len(chosen) == count:
+                break
+        return chosen
+
+    def to_bytes(self) -> bytes:
+        return bytes(self._bits)
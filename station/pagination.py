@@ -0,0 +1,183 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    CursorPagination,
+    Cursor,
+    LimitOffsetPagination
+)
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination keyed on every field of `ordering`.
+
+    Unlike CursorPagination, which seeks on the first ordering field and
+    skips ties with an offset, the cursor stores the full key of the
+    boundary row, so every page is a single index range scan.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [
+                field[1:] if field.startswith("-") else f"-{field}"
+                for field in ordering
+            ]
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            queryset = queryset.filter(
+                self._after(self.cursor.position, ordering)
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        self.display_page_controls = self.has_next or self.has_previous
+        return self.page
+
+    @staticmethod
+    def _after(position, ordering):
+        condition = Q()
+        for index, field in enumerate(ordering):
+            lookup = "lt" if field.startswith("-") else "gt"
+            seek = Q(**{f"{field.lstrip('-')}__{lookup}": position[index]})
+            for previous, value in zip(ordering[:index], position):
+                seek &= Q(**{previous.lstrip("-"): value})
+            condition |= seek
+        return condition
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None:
+            return None
+
+        try:
+            position = json.loads(cursor.position)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if (
+            not isinstance(position, list)
+            or len(position) != len(self.ordering)
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+        try:
+            position = [
+                self.model._meta.get_field(field.lstrip("-")).to_python(value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (ValidationError, ValueError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        if None in position:
+            raise NotFound(self.invalid_cursor_message)
+
+        return Cursor(offset=0, reverse=cursor.reverse, position=position)
+
+    def _get_position_from_instance(self, instance, ordering):
+        return json.dumps(
+            [
+                str(getattr(instance, field.lstrip("-")))
+                for field in ordering
+            ]
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+
+        return self.encode_cursor(
+            Cursor(
+                offset=0,
+                reverse=False,
+                position=self._get_position_from_instance(
+                    self.page[-1], self.ordering
+                )
+            )
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+
+        return self.encode_cursor(
+            Cursor(
+                offset=0,
+                reverse=True,
+                position=self._get_position_from_instance(
+                    self.page[0], self.ordering
+                )
+            )
+        )
+
+
+class AsyncLimitOffsetPagination(LimitOffsetPagination):
+    """LimitOffsetPagination that counts and slices with the async ORM."""
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.count = await queryset.acount()
+        self.offset = self.get_offset(request)
+        if self.count == 0 or self.offset > self.count:
+            return []
+        return [
+            instance async for instance
+            in queryset[self.offset:self.offset + self.limit]
+        ]
+
+
+class JourneyCursorPagination(KeysetPagination):
+    ordering = ("departure_time", "id")
+
+
+class OrderCursorPagination(KeysetPagination):
+    ordering = ("-created_at", "-id")
+
+
+class TicketCursorPagination(KeysetPagination):
+    ordering = ("id",)
+
+
+class CursorPaginationMixin:
+    """Switch a viewset to `cursor_pagination_class` on ?pagination=cursor."""
+
+    cursor_pagination_class = None
+
+    @property
+    def paginator(self):
+        request = getattr(self, "request", None)
+        if (
+            not hasattr(self, "_paginator")
+            and self.cursor_pagination_class is not None
+            and request is not None
+            and request.query_params.get("pagination") == "cursor"
+        ):
+            self._paginator = self.cursor_pagination_class()
+        return super().paginator
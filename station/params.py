@@ -0,0 +1,28 @@
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+
+def station_param(name: str, value: str) -> int:
+    """Station id of query parameter `name`, 400 unless it is a number."""
+    if not value.isdigit():
+        raise ValidationError({name: f"Expected station id, not {value}"})
+    return int(value)
+
+
+def datetime_param(name: str, value: str):
+    """Aware datetime of ISO 8601 query parameter `name`, 400 if invalid.
+
+    Naive values are taken in the current time zone.
+    """
+    try:
+        moment = parse_datetime(value)
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise ValidationError(
+            {name: f"Expected ISO 8601 date and time, not {value}"}
+        )
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
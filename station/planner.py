@@ -0,0 +1,134 @@
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import NamedTuple
+
+from django.utils import timezone
+
+from station.models import Journey
+from station.reloading import ReloadableState
+
+
+class Connection(NamedTuple):
+    departure_time: datetime
+    journey_id: int
+    arrival_time: datetime
+    source: int
+    destination: int
+
+
+class ConnectionPlanner(ReloadableState):
+    """Earliest-arrival itineraries over upcoming journeys.
+
+    Journeys are kept in memory as connections sorted by departure time
+    and answered with the Connection Scan Algorithm. Saved and deleted
+    journeys are applied in place.
+    """
+
+    max_age_setting = "CONNECTION_PLANNER_MAX_AGE"
+
+    def __init__(self):
+        super().__init__()
+        self._connections = []
+
+    def _load(self):
+        journeys = (
+            Journey.objects
+            .filter(departure_time__gte=timezone.now())
+            .order_by("departure_time", "id")
+            .values_list(
+                "departure_time",
+                "id",
+                "arrival_time",
+                "route__source_id",
+                "route__destination_id"
+            )
+        )
+        self._connections = [
+            Connection(*journey)
+            for journey in journeys.iterator(chunk_size=5000)
+        ]
+
+    @property
+    def connections(self) -> list:
+        with self._lock:
+            self._ensure_loaded()
+            return self._connections
+
+    @staticmethod
+    def _without(connections, journey_id):
+        return [
+            connection for connection in connections
+            if connection.journey_id != journey_id
+        ]
+
+    def update_journey(self, journey: Journey):
+        with self._lock:
+            if not self.loaded:
+                return
+            connections = self._without(self._connections, journey.id)
+            insort(
+                connections,
+                Connection(
+                    journey.departure_time,
+                    journey.id,
+                    journey.arrival_time,
+                    journey.route.source_id,
+                    journey.route.destination_id
+                )
+            )
+            self._connections = connections
+
+    def remove_journey(self, journey_id: int):
+        with self._lock:
+            if not self.loaded:
+                return
+            self._connections = self._without(self._connections, journey_id)
+
+    def plan(
+        self,
+        source: int,
+        destination: int,
+        departure: datetime,
+        min_transfer: timedelta
+    ) -> list:
+        connections = self.connections
+        earliest_arrival = {source: departure}
+        arrived_by = {}
+
+        start = bisect_left(
+            connections, departure, key=lambda c: c.departure_time
+        )
+        for connection in islice(connections, start, None):
+            arrival = earliest_arrival.get(destination)
+            if arrival is not None and connection.departure_time >= arrival:
+                break
+
+            reached = earliest_arrival.get(connection.source)
+            if reached is None:
+                continue
+            if connection.source != source:
+                reached += min_transfer
+            if connection.departure_time < reached:
+                continue
+
+            best = earliest_arrival.get(connection.destination)
+            if best is None or connection.arrival_time < best:
+                earliest_arrival[connection.destination] = (
+                    connection.arrival_time
+                )
+                arrived_by[connection.destination] = connection
+
+        legs = []
+        station = destination
+        while station in arrived_by and len(legs) < len(arrived_by):
+            connection = arrived_by[station]
+            legs.append(connection)
+            station = connection.source
+
+        if station != source:
+            return []
+        return legs[::-1]
+
+
+planner = ConnectionPlanner()
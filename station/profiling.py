@@ -0,0 +1,190 @@
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db.backends.signals import connection_created
+from rest_framework.serializers import BaseSerializer
+
+from station.metrics import BucketCounts
+from train_station import settings
+
+TIME_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+METRIC_BUCKETS = {
+    "wall_ms": TIME_BUCKETS,
+    "db_ms": TIME_BUCKETS,
+    "queries": QUERY_BUCKETS,
+    "serializer_ms": TIME_BUCKETS,
+}
+
+_current_profile = ContextVar("current_profile", default=None)
+
+
+class Histogram(BucketCounts):
+    def as_dict(self) -> dict:
+        requests = self.count()
+        return {
+            "buckets": {
+                str(bound): count
+                for bound, count in zip(self.buckets + ("+Inf",), self.counts)
+            },
+            "sum": round(self.total, 3),
+            "mean": round(self.total / requests, 3) if requests else 0,
+        }
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_time = 0.0
+        self.queries = 0
+        self.serializer_time = 0.0
+
+    def metrics(self) -> dict:
+        return {
+            "wall_ms": (time.perf_counter() - self.started) * 1000,
+            "db_ms": self.db_time * 1000,
+            "queries": self.queries,
+            "serializer_ms": self.serializer_time * 1000,
+        }
+
+
+class ProfileStats:
+    """Per endpoint histograms of the sampled requests of this process."""
+
+    def __init__(self):
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, metrics: dict):
+        with self._lock:
+            histograms = self._endpoints.setdefault(endpoint, {
+                name: Histogram(buckets)
+                for name, buckets in METRIC_BUCKETS.items()
+            })
+            for name, value in metrics.items():
+                histograms[name].observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                endpoint: {
+                    "requests": histograms["wall_ms"].count(),
+                    **{
+                        name: histogram.as_dict()
+                        for name, histogram in histograms.items()
+                    },
+                }
+                for endpoint, histograms in sorted(self._endpoints.items())
+            }
+
+
+profile_stats = ProfileStats()
+
+
+def _profiled_execute(execute, sql, params, many, context):
+    profile = _current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.db_time += time.perf_counter() - started
+        profile.queries += 1
+
+
+def _add_query_timing(sender, connection, **kwargs):
+    if _profiled_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_profiled_execute)
+
+
+def install_query_timing():
+    """Time queries of profiled requests on every database connection.
+
+    The profile travels in a context variable, so queries run by the
+    async ORM in a worker thread are attributed to the right request.
+    """
+    connection_created.connect(_add_query_timing)
+
+
+def _profiled_data(data):
+    def wrapper(serializer):
+        profile = _current_profile.get()
+        if profile is None:
+            return data.fget(serializer)
+
+        started = time.perf_counter()
+        try:
+            return data.fget(serializer)
+        finally:
+            profile.serializer_time += time.perf_counter() - started
+
+    wrapper.profiled = True
+    return property(wrapper)
+
+
+def install_serializer_timing():
+    """Time `.data` of every serializer while a request is profiled.
+
+    `Serializer.data` and `ListSerializer.data` both delegate to
+    `BaseSerializer.data`, so wrapping it once covers either.
+    """
+    if not getattr(BaseSerializer.data.fget, "profiled", False):
+        BaseSerializer.data = _profiled_data(BaseSerializer.data)
+
+
+class ProfilingMiddleware:
+    """Sample `PROFILING_SAMPLE_RATE` of requests into `profile_stats`."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        self._record(request, profile)
+        return response
+
+    async def __acall__(self, request):
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return await self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        self._record(request, profile)
+        return response
+
+    @staticmethod
+    def _record(request, profile):
+        match = request.resolver_match
+        if match is not None:
+            profile_stats.record(
+                f"{request.method} {match.view_name}", profile.metrics()
+            )
@@ -0,0 +1,43 @@
+import threading
+
+from django.utils import timezone
+
+from train_station import settings
+
+
+class ReloadableState:
+    """Database rows held in memory and shared by the threads of a process.
+
+    Subclasses read their rows in `_load()`, which runs under `_lock` on
+    first use, after `invalidate()`, and once the rows are older than the
+    `max_age_setting` setting, so that changes made by other processes
+    are picked up as well. Changes made by this process are applied in
+    place by signal receivers after they commit.
+    """
+
+    max_age_setting = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded_at = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def _load(self):
+        raise NotImplementedError
+
+    def _ensure_loaded(self):
+        if (
+            not self.loaded
+            or timezone.now() - self._loaded_at
+            > getattr(settings, self.max_age_setting)
+        ):
+            loaded_at = timezone.now()
+            self._load()
+            self._loaded_at = loaded_at
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
@@ -1,6 +1,11 @@
-from django.db import transaction
+from collections import defaultdict
+
+from django.db import transaction, IntegrityError
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
+from station.images import validate_image_upload, variant_urls
+from station.metrics import orders_created, seat_conflicts
 from station.models import (
     Station,
     Crew,
@@ -9,6 +14,7 @@ from station.models import (
     Train,
     TrainType,
     Order,
+    SeatHold,
     Ticket)
 
 
@@ -41,8 +47,29 @@ class TrainImageSerializer(serializers.ModelSerializer):
         model = Train
         fields = ("id", "image",)
 
+    def validate_image(self, image):
+        return validate_image_upload(image)
+
+
+class TrainImageVariantsMixin(serializers.Serializer):
+    image_variants = serializers.SerializerMethodField()
+
+    @extend_schema_field(
+        {
+            "type": "object",
+            "additionalProperties": {
+                "type": "object",
+                "additionalProperties": {"type": "string", "format": "uri"}
+            }
+        }
+    )
+    def get_image_variants(self, obj):
+        return variant_urls(obj, self.context.get("request"))
+
 
-class TrainListSerializer(serializers.ModelSerializer):
+class TrainListSerializer(
+    TrainImageVariantsMixin, serializers.ModelSerializer
+):
     train_type = serializers.CharField(
         source="train_type.name",
         read_only=True
@@ -50,12 +77,22 @@ class TrainListSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Train
-        fields = ("id", "name", "cargo_num", "places_in_cargo", "train_type",)
+        fields = (
+            "id",
+            "name",
+            "cargo_num",
+            "places_in_cargo",
+            "train_type",
+            "image_variants",
+        )
 
 
-class TrainRetrieveSerializer(TrainSerializer):
+class TrainRetrieveSerializer(TrainImageVariantsMixin, TrainSerializer):
     train_type = TrainTypeSerializer(read_only=True)
 
+    class Meta(TrainSerializer.Meta):
+        fields = TrainSerializer.Meta.fields + ("image_variants",)
+
 
 class RouteSerializer(serializers.ModelSerializer):
     class Meta:
@@ -100,6 +137,35 @@ class JourneySerializer(serializers.ModelSerializer):
         )
 
 
+class JourneyImportRowSerializer(serializers.Serializer):
+    route = serializers.IntegerField()
+    train = serializers.IntegerField()
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    crew = serializers.ListField(
+        child=serializers.IntegerField(), required=False, default=list
+    )
+
+    def to_internal_value(self, data):
+        crew = data.get("crew") if hasattr(data, "get") else None
+        if isinstance(crew, str):
+            data = {
+                **data,
+                "crew": [
+                    crew_id for crew_id in crew.replace(";", ",").split(",")
+                    if crew_id.strip()
+                ]
+            }
+        return super().to_internal_value(data)
+
+    def validate(self, attrs):
+        if attrs["arrival_time"] <= attrs["departure_time"]:
+            raise serializers.ValidationError(
+                {"arrival_time": "Arrival must be after departure"}
+            )
+        return attrs
+
+
 class JourneyListSerializer(serializers.ModelSerializer):
     route = serializers.CharField(source="route.route", read_only=True)
     train_name = serializers.CharField(source="train.name", read_only=True)
@@ -145,16 +211,23 @@ class JourneyRetrieveSerializer(JourneySerializer):
         )
 
     def get_taken_seats(self, obj):
-        tickets = Ticket.objects.filter(journey=obj).values_list(
-            "cargo", "seat"
-        )
-        taken_seats = {}
-        for cargo, seat in tickets:
-            if cargo not in taken_seats:
-                taken_seats[cargo] = []
-            taken_seats[cargo].append(seat)
+        return obj.seat_map.taken_seats()
 
-        return taken_seats
+
+class JourneySeatsSerializer(serializers.ModelSerializer):
+    taken_seats = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Journey
+        fields = ("id", "version", "taken_seats",)
+
+    def get_taken_seats(self, obj):
+        return obj.seat_map.taken_seats()
+
+
+class SeatEventsTicketSerializer(serializers.Serializer):
+    ticket = serializers.CharField(read_only=True)
+    expires_in = serializers.IntegerField(read_only=True)
 
 
 class TicketSerializer(serializers.ModelSerializer):
@@ -172,8 +245,76 @@ class TicketSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class PrefetchedJourneyField(serializers.PrimaryKeyRelatedField):
+    def to_internal_value(self, data):
+        list_serializer = getattr(self.parent, "parent", None)
+        journeys = getattr(list_serializer, "journeys", {})
+        try:
+            return journeys[int(data)]
+        except (KeyError, TypeError, ValueError):
+            return super().to_internal_value(data)
+
+
+class BulkTicketListSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        journey_ids = set()
+        if isinstance(data, list):
+            for item in data:
+                try:
+                    journey_ids.add(int(item["journey"]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+        self.journeys = (
+            Journey.objects
+            .select_related("train")
+            .in_bulk(journey_ids)
+        )
+        attrs = super().to_internal_value(data)
+
+        request = self.context.get("request")
+        held = SeatHold.held_seats(
+            self.journeys, exclude_user=getattr(request, "user", None)
+        )
+
+        errors = []
+        requested = set()
+        for ticket in attrs:
+            seat = (ticket["journey"].id, ticket["cargo"], ticket["seat"])
+            if seat in requested:
+                errors.append(
+                    {"seat": "This seat is requested more than once"}
+                )
+            elif ticket["journey"].seat_map.is_taken(
+                ticket["cargo"], ticket["seat"]
+            ):
+                seat_conflicts.inc("seat_taken")
+                errors.append({"seat": "This seat is already taken"})
+            elif seat in held:
+                seat_conflicts.inc("held")
+                errors.append(
+                    {"seat": "This seat is held by another customer"}
+                )
+            else:
+                errors.append({})
+            requested.add(seat)
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return attrs
+
+
+class OrderTicketSerializer(TicketSerializer):
+    journey = PrefetchedJourneyField(
+        queryset=Journey.objects.select_related("train")
+    )
+
+    class Meta(TicketSerializer.Meta):
+        list_serializer_class = BulkTicketListSerializer
+        validators = []
+
+
 class OrderSerializer(serializers.ModelSerializer):
-    tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
+    tickets = OrderTicketSerializer(many=True, allow_empty=False)
 
     class Meta:
         model = Order
@@ -183,9 +324,53 @@ class OrderSerializer(serializers.ModelSerializer):
         with transaction.atomic():
             tickets_data = validated_data.pop("tickets")
             order = Order.objects.create(**validated_data)
+
+            seats = defaultdict(list)
             for ticket_data in tickets_data:
-                Ticket.objects.create(order=order, **ticket_data)
+                seats[ticket_data["journey"].id].append(
+                    (ticket_data["cargo"], ticket_data["seat"])
+                )
+            for journey_id in sorted(seats):
+                Journey.book_seats(
+                    journey_id, seats[journey_id], user=order.user
+                )
+
+            try:
+                Ticket.objects.bulk_create(
+                    Ticket(order=order, **ticket_data)
+                    for ticket_data in tickets_data
+                )
+            except IntegrityError:
+                seat_conflicts.inc("unique_ticket")
+                raise serializers.ValidationError(
+                    {"tickets": "One of the seats is already taken"}
+                )
+
+            transaction.on_commit(lambda: orders_created.inc("order"))
+            return order
+
 
+class SeatAllocationSerializer(serializers.Serializer):
+    journey = serializers.PrimaryKeyRelatedField(
+        queryset=Journey.objects.all()
+    )
+    party_size = serializers.IntegerField(min_value=1)
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            order = Order.objects.create(user=validated_data["user"])
+            journey = validated_data["journey"]
+            seats = Journey.allocate_seats(
+                journey.id,
+                validated_data["party_size"],
+                user=order.user
+            )
+            Ticket.objects.bulk_create(
+                Ticket(cargo=cargo, seat=seat, journey=journey, order=order)
+                for cargo, seat in seats
+            )
+
+            transaction.on_commit(lambda: orders_created.inc("allocation"))
             return order
 
 
@@ -199,3 +384,44 @@ class OrderListSerializer(OrderSerializer):
     class Meta:
         model = Order
         fields = ("id", "created_at", "tickets")
+
+
+class SeatSerializer(serializers.Serializer):
+    cargo = serializers.IntegerField()
+    seat = serializers.IntegerField()
+
+
+class SeatHoldSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SeatHold
+        fields = ("id", "journey", "cargo", "seat", "expires_at",)
+
+
+class SeatHoldCreateSerializer(serializers.Serializer):
+    journey = serializers.PrimaryKeyRelatedField(
+        queryset=Journey.objects.select_related("train")
+    )
+    seats = SeatSerializer(many=True, allow_empty=False)
+
+    def validate(self, attrs):
+        train = attrs["journey"].train
+        seats = [(seat["cargo"], seat["seat"]) for seat in attrs["seats"]]
+        for cargo, seat in seats:
+            Ticket.validate_ticket(
+                seat,
+                train.places_in_cargo,
+                cargo,
+                train.cargo_num
+            )
+        if len(set(seats)) != len(seats):
+            raise serializers.ValidationError(
+                {"seats": "Each seat can be held only once"}
+            )
+        return attrs
+
+    def create(self, validated_data):
+        return SeatHold.place(
+            validated_data["journey"].id,
+            validated_data["user"],
+            [(seat["cargo"], seat["seat"]) for seat in validated_data["seats"]]
+        )
@@ -0,0 +1,148 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from station.cache import invalidate_namespace
+from station.distances import distances
+from station.geo import station_index
+from station.images import refresh_variants
+from station.models import (
+    Crew,
+    Journey,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType
+)
+from station.planner import planner
+
+
+@receiver(post_save, sender=Ticket)
+def book_ticket_seat(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+
+    seat = (instance.journey_id, instance.cargo, instance.seat)
+    booked_seat = getattr(instance, "_booked_seat", None)
+    if not created and booked_seat == seat:
+        return
+
+    if booked_seat is not None:
+        journey_id, cargo, place = booked_seat
+        Journey.release_seats(journey_id, [(cargo, place)])
+    Journey.book_seats(instance.journey_id, [(instance.cargo, instance.seat)])
+    instance._booked_seat = seat
+
+
+@receiver(post_delete, sender=Ticket)
+def release_ticket_seat(sender, instance, **kwargs):
+    Journey.release_seats(
+        instance.journey_id,
+        [(instance.cargo, instance.seat)]
+    )
+
+
+@receiver(post_save, sender=Train)
+def rebuild_train_occupancy(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    if getattr(instance, "_seat_layout", None) == instance.seat_layout:
+        return
+
+    for journey in instance.journey_set.select_related("train"):
+        journey.rebuild_occupancy()
+    instance._seat_layout = instance.seat_layout
+
+
+@receiver(post_save, sender=Train)
+def refresh_train_image_variants(sender, instance, raw=False, **kwargs):
+    if raw or getattr(instance, "_image_name", "") == instance.image.name:
+        return
+
+    refresh_variants(instance)
+    instance._image_name = instance.image.name
+
+
+@receiver(post_save, sender=Journey)
+def rebuild_journey_occupancy(sender, instance, created, raw=False,
+                              **kwargs):
+    if raw:
+        return
+    if not created and getattr(instance, "_train_id", None) != (
+        instance.train_id
+    ):
+        instance.rebuild_occupancy()
+    instance._train_id = instance.train_id
+
+
+@receiver(post_save, sender=Journey)
+def update_planner_journey(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(lambda: planner.update_journey(instance))
+
+
+@receiver(post_delete, sender=Journey)
+def remove_planner_journey(sender, instance, **kwargs):
+    journey_id = instance.id
+    transaction.on_commit(lambda: planner.remove_journey(journey_id))
+
+
+@receiver(post_save, sender=Route)
+def bump_route_journey_versions(sender, instance, created, raw=False,
+                                **kwargs):
+    if not created and not raw:
+        instance.journey_set.update(version=F("version") + 1)
+
+
+@receiver([post_save, post_delete], sender=Route)
+def invalidate_planner(sender, **kwargs):
+    transaction.on_commit(planner.invalidate)
+
+
+@receiver(post_save, sender=Route)
+def update_route_distances(sender, instance, raw=False, **kwargs):
+    if raw:
+        transaction.on_commit(distances.invalidate)
+    else:
+        transaction.on_commit(lambda: distances.update_route(instance))
+
+
+@receiver(post_delete, sender=Route)
+def remove_route_distances(sender, instance, **kwargs):
+    route_id = instance.id
+    transaction.on_commit(lambda: distances.remove_route(route_id))
+
+
+@receiver([post_save, post_delete], sender=Station)
+def invalidate_station_index(sender, **kwargs):
+    transaction.on_commit(station_index.invalidate)
+
+
+CACHE_NAMESPACES = {
+    Crew: "crews",
+    Station: "stations",
+    TrainType: "train_types",
+    Train: "trains",
+    Route: "routes",
+}
+
+
+@receiver([post_save, post_delete])
+def invalidate_cached_responses(sender, **kwargs):
+    namespace = CACHE_NAMESPACES.get(sender)
+    if namespace is not None:
+        transaction.on_commit(lambda: invalidate_namespace(namespace))
+
+
+@receiver(m2m_changed, sender=Journey.crew.through)
+def bump_journey_version(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    journeys = Journey.objects.filter(pk=instance.pk)
+    if reverse:
+        journeys = Journey.objects.filter(pk__in=pk_set or ())
+    journeys.update(version=F("version") + 1)
@@ -0,0 +1,62 @@
+import hashlib
+import os
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage that names files after the SHA-256 of their content.
+
+    The directory and extension of the requested name are kept, the rest
+    is replaced by the digest, sharded by its first two characters.
+    Saving content that is already stored writes nothing and returns the
+    existing name, so identical uploads share one file and one URL.
+    Files may be referenced by several rows, so they are never deleted
+    on release; reusing a file refreshes its modification time instead,
+    which keeps it out of an orphan sweep that honours a minimum age.
+    """
+
+    def touch(self, name: str):
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def digest(content) -> str:
+        sha256 = hashlib.sha256()
+        if hasattr(content, "seek"):
+            content.seek(0)
+        for chunk in content.chunks():
+            sha256.update(chunk)
+        if hasattr(content, "seek"):
+            content.seek(0)
+        return sha256.hexdigest()
+
+    def content_name(self, name: str, content) -> str:
+        directory = os.path.dirname(name)
+        _, extension = os.path.splitext(name)
+        digest = self.digest(content)
+        return os.path.join(
+            directory, digest[:2], f"{digest}{extension.lower()}"
+        )
+
+    def _save(self, name, content):
+        name = self.content_name(name, content)
+        if self.exists(name):
+            self.touch(name)
+            return name
+
+        partial_name = super()._save(
+            f"{name}.{uuid.uuid4().hex}.part", content
+        )
+        os.replace(self.path(partial_name), self.path(name))
+        return name
+
+    def walk(self, directory=""):
+        directories, files = self.listdir(directory)
+        for name in files:
+            yield os.path.join(directory, name)
+        for subdirectory in directories:
+            yield from self.walk(os.path.join(directory, subdirectory))
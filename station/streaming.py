@@ -0,0 +1,35 @@
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+
+
+class AsyncStream:
+    """Async iterator over a sync one, advanced in a worker thread.
+
+    Under ASGI Django reads a sync streaming body into memory before
+    sending it, so bodies meant to stream are handed over as an async
+    iterator instead. Each step runs thread sensitive, in the thread
+    that served the request, so database cursors opened while iterating
+    stay on their connection. StreamingHttpResponse calls `close()` when
+    the response is done, which closes the wrapped iterator.
+    """
+
+    def __init__(self, iterator):
+        self.iterator = iter(iterator)
+
+    async def __aiter__(self):
+        step = sync_to_async(next, thread_sensitive=True)
+        done = object()
+        while (chunk := await step(self.iterator, done)) is not done:
+            yield chunk
+
+    def close(self):
+        close = getattr(self.iterator, "close", None)
+        if close is not None:
+            close()
+
+
+def streaming_content(request, iterator):
+    """Stream `iterator` in the form the server behind `request` needs."""
+    if isinstance(getattr(request, "_request", request), ASGIRequest):
+        return AsyncStream(iterator)
+    return iterator
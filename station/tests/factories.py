@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta, timezone
+
+from station.loadgen import LoadGenerator
+from station.models import (
+    Crew,
+    Journey,
+    Order,
+    Route,
+    SeatHold,
+    Station,
+    Ticket,
+    Train,
+    TrainType
+)
+
+
+def seed_timetable(user, journeys=2000, occupancy=0.02, seed=0) -> dict:
+    """Bulk insert a timetable with sold tickets owned by `user`."""
+    generator = LoadGenerator(prefix="Test", seed=seed)
+    stations = generator.create_stations(50)
+    routes = generator.create_routes(200, stations)
+    trains = generator.create_trains(20, cargo_num=10, places_in_cargo=50)
+    crews = generator.create_crews(100)
+    generator.create_journeys(
+        journeys,
+        routes,
+        trains,
+        crews,
+        [user],
+        start=datetime(2030, 1, 1, tzinfo=timezone.utc),
+        occupancy=occupancy,
+        hot_share=0.01
+    )
+
+    journey = Journey.objects.filter(tickets_sold__lt=500).first()
+    SeatHold.objects.create(
+        journey=journey,
+        cargo=1,
+        seat=journey.seat_map.free_seats(1)[0],
+        user=user,
+        expires_at=datetime.now(timezone.utc) + timedelta(days=1)
+    )
+
+    return {
+        "station": Station.objects.first(),
+        "route": Route.objects.first(),
+        "train": Train.objects.first(),
+        "traintype": TrainType.objects.first(),
+        "crew": Crew.objects.first(),
+        "journey": journey,
+        "order": Order.objects.first(),
+        "ticket": Ticket.objects.first(),
+    }
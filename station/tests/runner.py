@@ -0,0 +1,66 @@
+from unittest import TextTestResult
+
+from django.core.cache import caches
+from django.test.runner import (
+    DiscoverRunner,
+    ParallelTestSuite,
+    RemoteTestResult,
+    RemoteTestRunner
+)
+
+
+def clear_caches():
+    for cache in caches.all(initialized_only=True):
+        cache.clear()
+
+
+class CacheClearingResultMixin:
+    """Start every test with empty caches.
+
+    Throttle counters and cached responses otherwise leak from one test
+    into the next, since database rollbacks do not reach the caches.
+    """
+
+    def startTest(self, test):
+        clear_caches()
+        super().startTest(test)
+
+
+class CacheClearingRemoteTestResult(
+    CacheClearingResultMixin, RemoteTestResult
+):
+    pass
+
+
+class CacheClearingRemoteTestRunner(RemoteTestRunner):
+    resultclass = CacheClearingRemoteTestResult
+
+
+class CacheClearingParallelTestSuite(ParallelTestSuite):
+    runner_class = CacheClearingRemoteTestRunner
+
+
+class CacheClearingTestRunner(DiscoverRunner):
+    """Test runner that clears caches before every test.
+
+    Tests tagged "performance" depend on the speed of the machine and
+    are skipped unless asked for with `--tag performance`.
+    """
+
+    parallel_test_suite = CacheClearingParallelTestSuite
+
+    def __init__(self, *args, tags=None, exclude_tags=None, **kwargs):
+        exclude_tags = set(exclude_tags or ())
+        if "performance" not in (tags or ()):
+            exclude_tags.add("performance")
+        super().__init__(
+            *args, tags=tags, exclude_tags=exclude_tags, **kwargs
+        )
+
+    def get_resultclass(self):
+        resultclass = super().get_resultclass() or TextTestResult
+        return type(
+            f"CacheClearing{resultclass.__name__}",
+            (CacheClearingResultMixin, resultclass),
+            {}
+        )
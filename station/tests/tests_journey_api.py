@@ -0,0 +1,905 @@
+import asyncio
+import base64
+import gzip
+import json
+import tempfile
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from unittest import mock
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from station.async_views import AsyncJourneySeatsView
+from station.events import seat_events
+from station.models import (
+    Crew,
+    Journey,
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType
+)
+from station.occupancy import SeatMap
+from station.planner import planner
+from station.timetable import TimetableSnapshot
+
+JOURNEY_URL = reverse("station:journey-list")
+
+
+def detail_url(journey_id):
+    return reverse("station:journey-detail", args=(journey_id,))
+
+
+def sample_station(name, **params) -> Station:
+    defaults = {"latitude": 50.45, "longitude": 30.52}
+    defaults.update(params)
+    return Station.objects.create(name=name, **defaults)
+
+
+def sample_route(**params) -> Route:
+    source = Station.objects.get_or_create(
+        name="Kyiv", defaults={"latitude": 50.45, "longitude": 30.52}
+    )[0]
+    destination = Station.objects.get_or_create(
+        name="Lviv", defaults={"latitude": 49.84, "longitude": 24.03}
+    )[0]
+    defaults = {"source": source, "destination": destination, "distance": 540}
+    defaults.update(params)
+    return Route.objects.create(**defaults)
+
+
+def sample_journey(**params) -> Journey:
+    train_type, _ = TrainType.objects.get_or_create(name="Default Type")
+    defaults = {
+        "departure_time": datetime(2030, 1, 1, 8, tzinfo=timezone.utc),
+        "arrival_time": datetime(2030, 1, 1, 14, tzinfo=timezone.utc),
+    }
+    defaults.update(params)
+    if "route" not in defaults:
+        defaults["route"] = sample_route()
+    if "train" not in defaults:
+        defaults["train"] = Train.objects.create(
+            name="Test",
+            cargo_num=3,
+            places_in_cargo=10,
+            train_type=train_type
+        )
+    return Journey.objects.create(**defaults)
+
+
+class JourneyOccupancyTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test", password="test"
+        )
+        self.client.force_authenticate(self.user)
+        self.journey = sample_journey()
+        self.order = Order.objects.create(user=self.user)
+
+    def test_ticket_create_and_delete_updates_occupancy(self) -> None:
+        ticket = Ticket.objects.create(
+            cargo=2, seat=7, journey=self.journey, order=self.order
+        )
+        self.journey.refresh_from_db()
+        self.assertTrue(self.journey.seat_map.is_taken(2, 7))
+
+        ticket.delete()
+        self.journey.refresh_from_db()
+        self.assertFalse(self.journey.seat_map.is_taken(2, 7))
+
+    def test_ticket_seat_change_moves_occupancy(self) -> None:
+        ticket = Ticket.objects.create(
+            cargo=1, seat=1, journey=self.journey, order=self.order
+        )
+        ticket = Ticket.objects.get(pk=ticket.pk)
+        ticket.seat = 2
+        ticket.save()
+
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.seat_map.taken_seats(), {1: [2]})
+
+    def test_stale_journey_save_keeps_occupancy(self) -> None:
+        stale = Journey.objects.get(pk=self.journey.pk)
+        Ticket.objects.create(
+            cargo=1, seat=1, journey=self.journey, order=self.order
+        )
+
+        stale.departure_time += timedelta(minutes=5)
+        stale.save()
+
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.tickets_sold, 1)
+        self.assertEqual(self.journey.seat_map.taken_seats(), {1: [1]})
+        self.assertEqual(
+            self.journey.departure_time, stale.departure_time
+        )
+
+    def test_moving_journey_to_other_train_rebuilds_occupancy(self) -> None:
+        Ticket.objects.create(
+            cargo=2, seat=1, journey=self.journey, order=self.order
+        )
+        journey = Journey.objects.get(pk=self.journey.pk)
+        journey.train = Train.objects.create(
+            name="Wide",
+            cargo_num=2,
+            places_in_cargo=20,
+            train_type=self.journey.train.train_type
+        )
+        journey.save()
+
+        journey.refresh_from_db()
+        self.assertEqual(journey.seat_map.taken_seats(), {2: [1]})
+        self.assertEqual(journey.tickets_sold, 1)
+        with self.assertRaises(ValidationError):
+            Journey.book_seats(journey.id, [(2, 1)])
+
+    def test_retrieve_journey_taken_seats(self) -> None:
+        Ticket.objects.create(
+            cargo=1, seat=3, journey=self.journey, order=self.order
+        )
+        Ticket.objects.create(
+            cargo=3, seat=10, journey=self.journey, order=self.order
+        )
+
+        res = self.client.get(detail_url(self.journey.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["taken_seats"], {1: [3], 3: [10]})
+
+    def test_retrieve_journey_not_modified_until_ticket_changes(self) -> None:
+        url = detail_url(self.journey.id)
+        etag = self.client.get(url)["ETag"]
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Ticket.objects.create(
+            cargo=1, seat=3, journey=self.journey, order=self.order
+        )
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_journey_seats_conditional_get(self) -> None:
+        url = reverse("station:journey-seats", args=(self.journey.id,))
+        res = self.client.get(url)
+        self.assertEqual(res.data["taken_seats"], {})
+
+        ticket = Ticket.objects.create(
+            cargo=2, seat=1, journey=self.journey, order=self.order
+        )
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=res["ETag"])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["taken_seats"], {2: [1]})
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=res["ETag"])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        ticket.delete()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=res["ETag"])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_journeys_tickets_available(self) -> None:
+        Ticket.objects.create(
+            cargo=1, seat=1, journey=self.journey, order=self.order
+        )
+        Ticket.objects.create(
+            cargo=1, seat=2, journey=self.journey, order=self.order
+        )
+
+        res = self.client.get(JOURNEY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"][0]["tickets_available"], 28)
+
+    def test_reconcile_journey_counters(self) -> None:
+        Ticket.objects.create(
+            cargo=1, seat=1, journey=self.journey, order=self.order
+        )
+        Journey.objects.filter(pk=self.journey.pk).update(
+            tickets_sold=5, occupancy=b""
+        )
+
+        call_command("reconcile_journey_counters", stdout=StringIO())
+
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.tickets_sold, 1)
+        self.assertTrue(self.journey.seat_map.is_taken(1, 1))
+
+    def test_reconcile_repairs_misplaced_seats(self) -> None:
+        Ticket.objects.create(
+            cargo=2, seat=1, journey=self.journey, order=self.order
+        )
+        misplaced = SeatMap(3, 10)
+        misplaced.take(1, 1)
+        Journey.objects.filter(pk=self.journey.pk).update(
+            occupancy=misplaced.to_bytes()
+        )
+
+        out = StringIO()
+        call_command("reconcile_journey_counters", stdout=out)
+
+        self.assertIn("1 journeys drifted.", out.getvalue())
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.seat_map.taken_seats(), {2: [1]})
+
+    def test_tickets_outside_shrunk_train(self) -> None:
+        Ticket.objects.create(
+            cargo=1, seat=1, journey=self.journey, order=self.order
+        )
+        outside = Ticket.objects.create(
+            cargo=3, seat=10, journey=self.journey, order=self.order
+        )
+        self.journey.train.cargo_num = 2
+        self.journey.train.save()
+
+        out = StringIO()
+        call_command("reconcile_journey_counters", dry_run=True, stdout=out)
+        self.assertIn("0 journeys drifted.", out.getvalue())
+
+        outside.delete()
+
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.tickets_sold, 1)
+        self.assertTrue(self.journey.seat_map.is_taken(1, 1))
+
+    def test_generate_load_keeps_counters_consistent(self) -> None:
+        call_command(
+            "generate_load",
+            stations=5,
+            routes=10,
+            trains=2,
+            crews=4,
+            customers=3,
+            journeys=20,
+            cargo_num=2,
+            places_in_cargo=10,
+            batch_size=7,
+            stdout=StringIO()
+        )
+
+        journeys = Journey.objects.filter(train__name__startswith="Load")
+        self.assertEqual(journeys.count(), 20)
+        for journey in journeys:
+            self.assertEqual(journey.tickets.count(), journey.tickets_sold)
+            self.assertEqual(journey.seat_map.count(), journey.tickets_sold)
+
+    def test_generate_load_rejects_impossible_start(self) -> None:
+        for start in ("2024-13-01T00:00", "tomorrow"):
+            with self.assertRaises(CommandError):
+                call_command("generate_load", start=start, stdout=StringIO())
+
+
+class JourneySearchTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test", password="test"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_search_by_stations_and_departure_window(self) -> None:
+        morning = sample_journey()
+        evening = sample_journey(
+            departure_time=datetime(2030, 1, 1, 18, tzinfo=timezone.utc),
+            arrival_time=datetime(2030, 1, 1, 23, tzinfo=timezone.utc),
+        )
+        odesa = sample_station("Odesa")
+        sample_journey(
+            route=sample_route(destination=odesa, distance=470)
+        )
+
+        res = self.client.get(
+            reverse("station:journey-search"),
+            {
+                "source": morning.route.source_id,
+                "destination": morning.route.destination_id,
+                "departure_after": "2030-01-01T06:00:00Z",
+                "departure_before": "2030-01-01T20:00:00Z",
+            }
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [journey["id"] for journey in res.data["results"]],
+            [morning.id, evening.id]
+        )
+
+    def test_search_rejects_invalid_departure(self) -> None:
+        res = self.client.get(
+            reverse("station:journey-search"),
+            {"departure_after": "tomorrow"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_rejects_impossible_departure(self) -> None:
+        res = self.client.get(
+            reverse("station:journey-search"),
+            {"departure_after": "2024-13-45T00:00"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("departure_after", res.data)
+
+
+class JourneyConnectionsTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test", password="test"
+        )
+        self.client.force_authenticate(self.user)
+        planner.invalidate()
+
+        self.first_leg = sample_journey()
+        self.kyiv = self.first_leg.route.source
+        self.lviv = self.first_leg.route.destination
+        self.uzhhorod = sample_station("Uzhhorod")
+        self.second_leg = sample_journey(
+            route=sample_route(
+                source=self.lviv, destination=self.uzhhorod, distance=260
+            ),
+            departure_time=datetime(2030, 1, 1, 14, 30, tzinfo=timezone.utc),
+            arrival_time=datetime(2030, 1, 1, 18, tzinfo=timezone.utc),
+        )
+
+    def connections(self, **params):
+        return self.client.get(
+            reverse("station:journey-connections"),
+            {
+                "source": self.kyiv.id,
+                "destination": self.uzhhorod.id,
+                "departure": "2030-01-01T00:00:00Z",
+                **params
+            }
+        )
+
+    def test_connection_with_transfer(self) -> None:
+        res = self.connections()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["transfers"], 1)
+        self.assertEqual(
+            [leg["id"] for leg in res.data["legs"]],
+            [self.first_leg.id, self.second_leg.id]
+        )
+
+    def test_connection_respects_min_transfer(self) -> None:
+        res = self.connections(min_transfer=60)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_connection_picks_up_new_journeys(self) -> None:
+        self.connections(min_transfer=60)
+        with self.captureOnCommitCallbacks(execute=True):
+            later_leg = sample_journey(
+                route=self.second_leg.route,
+                departure_time=datetime(2030, 1, 1, 16, tzinfo=timezone.utc),
+                arrival_time=datetime(2030, 1, 1, 19, tzinfo=timezone.utc),
+            )
+
+        res = self.connections(min_transfer=60)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["legs"][-1]["id"], later_leg.id)
+
+    def test_connection_rejects_impossible_departure(self) -> None:
+        res = self.connections(departure="2024-02-30T10:00")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_connection_ignores_crews_filter(self) -> None:
+        res = self.connections(crews="999")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["legs"]), 2)
+
+    def test_connection_with_journey_deleted_elsewhere(self) -> None:
+        self.connections()
+        with self.captureOnCommitCallbacks(execute=False):
+            self.second_leg.delete()
+
+        res = self.connections()
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class JourneyCursorPaginationTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test", password="test"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_cursor_pagination_walks_timetable_in_order(self) -> None:
+        route = sample_route()
+        journeys = [
+            sample_journey(
+                route=route,
+                departure_time=datetime(
+                    2030, 1, 1, 8 + hour // 2, tzinfo=timezone.utc
+                ),
+                arrival_time=datetime(2030, 1, 2, tzinfo=timezone.utc),
+            )
+            for hour in range(7)
+        ]
+
+        url = f"{JOURNEY_URL}?pagination=cursor&page_size=3"
+        seen = []
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            seen.extend(journey["id"] for journey in res.data["results"])
+            url = res.data["next"]
+
+        self.assertEqual(seen, [journey.id for journey in journeys])
+
+        res = self.client.get(res.data["previous"])
+        self.assertEqual(
+            [journey["id"] for journey in res.data["results"]],
+            [journey.id for journey in journeys[3:6]]
+        )
+
+    def test_cursor_with_invalid_position_rejected(self) -> None:
+        sample_journey()
+        for position in (["garbage", "x"], ["2030-01-01T08:00:00Z", None]):
+            cursor = base64.b64encode(
+                urlencode({"p": json.dumps(position)}).encode()
+            ).decode()
+
+            res = self.client.get(
+                JOURNEY_URL, {"pagination": "cursor", "cursor": cursor}
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class AsyncJourneyApiTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test", password="test"
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+        self.journey = sample_journey()
+
+    def test_async_list_matches_sync_list(self) -> None:
+        sample_journey(route=self.journey.route, train=self.journey.train)
+
+        res = self.client.get(reverse("station:journey-list-async"))
+        sync_res = self.client.get(JOURNEY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), sync_res.json())
+
+    def test_async_retrieve_matches_sync_retrieve(self) -> None:
+        url = reverse("station:journey-detail-async", args=(self.journey.id,))
+
+        res = self.client.get(url)
+        sync_res = self.client.get(detail_url(self.journey.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), sync_res.json())
+        self.assertEqual(res["ETag"], sync_res["ETag"])
+
+    def test_async_retrieve_unknown_journey(self) -> None:
+        res = self.client.get(
+            reverse(
+                "station:journey-detail-async", args=(self.journey.id + 1,)
+            )
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_async_requires_authentication(self) -> None:
+        self.client.credentials()
+
+        res = self.client.get(reverse("station:journey-list-async"))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_async_seats_long_poll(self) -> None:
+        url = reverse("station:journey-seats-async", args=(self.journey.id,))
+        etag = self.client.get(url)["ETag"]
+
+        res = self.client.get(f"{url}?wait=1", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Journey.book_seats(self.journey.id, [(2, 3)])
+        res = self.client.get(f"{url}?wait=1", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["taken_seats"], {"2": [3]})
+        self.assertNotEqual(res["ETag"], etag)
+
+    async def test_async_seats_long_poll_waits_for_notifications(
+        self
+    ) -> None:
+        url = reverse("station:journey-seats-async", args=(self.journey.id,))
+        headers = {
+            "Authorization": f"Bearer {AccessToken.for_user(self.user)}"
+        }
+        etag = (await self.async_client.get(url, headers=headers))["ETag"]
+        journey_version = mock.AsyncMock(
+            wraps=AsyncJourneySeatsView.journey_version
+        )
+
+        with mock.patch.object(
+            AsyncJourneySeatsView, "journey_version", journey_version
+        ):
+            poll = asyncio.create_task(
+                self.async_client.get(
+                    f"{url}?wait=3",
+                    headers={**headers, "If-None-Match": etag}
+                )
+            )
+            while not seat_events.subscriber_count(self.journey.id):
+                await asyncio.sleep(0.01)
+            seat_events.publish(self.journey.id, "taken", [])
+            res = await poll
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        # Once up front, once when notified and once when the wait expired.
+        self.assertEqual(journey_version.await_count, 3)
+        self.assertEqual(seat_events.subscriber_count(self.journey.id), 0)
+
+
+class JourneySeatEventsTest(TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test", password="test"
+        )
+        self.token = AccessToken.for_user(self.user)
+        self.journey = sample_journey()
+        self.url = reverse(
+            "station:journey-seat-events", args=(self.journey.id,)
+        )
+
+    def book_and_release(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(user=self.user)
+            ticket = Ticket.objects.create(
+                cargo=2, seat=4, journey=self.journey, order=order
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.delete()
+
+    async def test_stream_sends_snapshot_then_deltas(self) -> None:
+        await sync_to_async(Journey.book_seats)(self.journey.id, [(1, 1)])
+
+        res = await self.async_client.get(
+            self.url, headers={"Authorization": f"Bearer {self.token}"}
+        )
+        self.assertEqual(res["Content-Type"], "text/event-stream")
+        events = aiter(res.streaming_content)
+
+        snapshot = (await anext(events)).decode()
+        self.assertEqual(seat_events.subscriber_count(self.journey.id), 1)
+        self.assertIn("event: snapshot", snapshot)
+        self.assertIn('data: {"seats": {"1": [1]}}', snapshot)
+
+        await sync_to_async(self.book_and_release)()
+        self.assertEqual(
+            await anext(events),
+            b'event: taken\ndata: {"seats": {"2": [4]}}\n\n'
+        )
+        self.assertEqual(
+            await anext(events),
+            b'event: released\ndata: {"seats": {"2": [4]}}\n\n'
+        )
+        await events.aclose()
+        await sync_to_async(res.close)()
+        self.assertEqual(seat_events.subscriber_count(self.journey.id), 0)
+
+    @mock.patch("station.async_views.settings.SEAT_EVENTS_HEARTBEAT", 0.05)
+    async def test_stream_catches_up_with_changes_of_other_processes(
+        self
+    ) -> None:
+        res = await self.async_client.get(
+            self.url, headers={"Authorization": f"Bearer {self.token}"}
+        )
+        events = aiter(res.streaming_content)
+        self.assertIn(b'"seats": {}', await anext(events))
+        self.assertEqual(await anext(events), b": keep-alive\n\n")
+
+        # Not published to the broker, as if booked by another process.
+        await sync_to_async(Journey.book_seats)(self.journey.id, [(3, 5)])
+        snapshot = (await anext(events)).decode()
+
+        self.assertIn("event: snapshot", snapshot)
+        self.assertIn('data: {"seats": {"3": [5]}}', snapshot)
+        await events.aclose()
+        await sync_to_async(res.close)()
+
+    @mock.patch("station.events.settings.SEAT_EVENTS_QUEUE_SIZE", 2)
+    async def test_slow_subscriber_is_told_to_resync(self) -> None:
+        subscription = seat_events.subscribe(self.journey.id)
+        self.addCleanup(seat_events.unsubscribe, subscription)
+        for seat in range(1, 4):
+            seat_events.publish(self.journey.id, "taken", [(1, seat)])
+        await asyncio.sleep(0)
+
+        self.assertEqual((await subscription.get()).seats, {1: [2]})
+        self.assertIsNone(await subscription.get())
+
+    def issue_ticket(self, journey_id=None) -> str:
+        client = APIClient()
+        client.force_authenticate(self.user)
+        res = client.post(
+            reverse(
+                "station:journey-seat-events-ticket",
+                args=(journey_id or self.journey.id,)
+            )
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return res.data["ticket"]
+
+    async def test_stream_accepts_ticket_once(self) -> None:
+        ticket = await sync_to_async(self.issue_ticket)()
+
+        res = await self.async_client.get(self.url, {"ticket": ticket})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        events = aiter(res.streaming_content)
+        self.assertIn(b"event: snapshot", await anext(events))
+        await events.aclose()
+        await sync_to_async(res.close)()
+
+        res = await self.async_client.get(self.url, {"ticket": ticket})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_stream_rejects_ticket_of_other_journey(self) -> None:
+        other = await sync_to_async(sample_journey)(
+            route=self.journey.route, train=self.journey.train
+        )
+        ticket = await sync_to_async(self.issue_ticket)(other.id)
+
+        res = await self.async_client.get(self.url, {"ticket": ticket})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_stream_rejects_token_parameter(self) -> None:
+        res = await self.async_client.get(self.url, {"token": str(self.token)})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_stream_requires_authentication(self) -> None:
+        res = await self.async_client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TimetableSnapshotTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test", password="test"
+        )
+        self.client.force_authenticate(self.user)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patcher = mock.patch(
+            "station.timetable.settings.TIMETABLE_SNAPSHOT_DIR", directory.name
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.journey = sample_journey()
+        self.next_day = sample_journey(
+            route=self.journey.route,
+            train=self.journey.train,
+            departure_time=datetime(2030, 1, 2, 8, tzinfo=timezone.utc),
+            arrival_time=datetime(2030, 1, 2, 14, tzinfo=timezone.utc)
+        )
+        self.url = reverse("station:journey-snapshot")
+
+    def export(self, *args) -> str:
+        out = StringIO()
+        call_command("export_timetable", *args, stdout=out)
+        return out.getvalue()
+
+    def test_snapshot_before_export(self) -> None:
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_snapshot_is_columnar_ndjson_per_day(self) -> None:
+        Journey.book_seats(self.journey.id, [(1, 1), (1, 2)])
+        self.export()
+
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        content = b"".join(res.streaming_content)
+        self.assertEqual(int(res["Content-Length"]), len(content))
+        days = [
+            json.loads(line)
+            for line in gzip.decompress(content).decode().splitlines()
+        ]
+        self.assertEqual(
+            [day["date"] for day in days], ["2030-01-01", "2030-01-02"]
+        )
+        self.assertEqual(
+            days[0]["columns"],
+            {
+                "id": [self.journey.id],
+                "route": [self.journey.route_id],
+                "source": [self.journey.route.source_id],
+                "destination": [self.journey.route.destination_id],
+                "departure_time": [
+                    int(self.journey.departure_time.timestamp())
+                ],
+                "arrival_time": [int(self.journey.arrival_time.timestamp())],
+                "train": [self.journey.train_id],
+                "tickets_available": [28],
+            }
+        )
+
+    def test_export_rewrites_changed_days_only(self) -> None:
+        self.export()
+        etag = self.client.get(self.url)["ETag"]
+
+        self.assertIn("0 written", self.export())
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Journey.book_seats(self.next_day.id, [(2, 2)])
+        self.assertIn("1 written, 0 removed", self.export())
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_replaced_partitions_kept_for_running_downloads(self) -> None:
+        self.export()
+        snapshot = TimetableSnapshot()
+        manifest = snapshot.manifest()
+
+        Journey.book_seats(self.next_day.id, [(2, 2)])
+        self.export()
+        self.assertTrue(b"".join(snapshot.iter_bytes(manifest)))
+
+        with mock.patch(
+            "station.timetable.settings.TIMETABLE_SNAPSHOT_GRACE",
+            timedelta(0)
+        ):
+            self.assertIn("0 written, 1 removed", self.export())
+        with self.assertRaises(FileNotFoundError):
+            b"".join(snapshot.iter_bytes(manifest))
+
+    def test_route_change_rewrites_partitions(self) -> None:
+        self.export()
+        route = self.journey.route
+        route.source = sample_station("Odesa")
+        route.save()
+
+        self.assertIn("2 written", self.export())
+        res = self.client.get(self.url)
+        day = json.loads(
+            gzip.decompress(b"".join(res.streaming_content)).splitlines()[0]
+        )
+        self.assertEqual(day["columns"]["source"], [route.source_id])
+
+        self.assertIn("2 written", self.export("--full"))
+
+
+class JourneyImportTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            email="admin@admin.test", password="test", is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+        self.template = sample_journey()
+        self.crews = [
+            Crew.objects.create(first_name="John", last_name=name)
+            for name in ("Doe", "Roe")
+        ]
+        self.url = reverse("station:journey-import-journeys")
+
+    def rows(self, count) -> list:
+        return [
+            {
+                "route": self.template.route_id,
+                "train": self.template.train_id,
+                "departure_time": f"2030-02-01T{hour % 24:02}:00:00Z",
+                "arrival_time": f"2030-02-02T{hour % 24:02}:00:00Z",
+                "crew": [crew.id for crew in self.crews],
+            }
+            for hour in range(count)
+        ]
+
+    def test_import_json_rows(self) -> None:
+        with (
+            mock.patch.object(planner, "invalidate") as invalidate,
+            self.captureOnCommitCallbacks(execute=True)
+        ):
+            res = self.client.post(self.url, self.rows(3), format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data, {"created": 3})
+        imported = Journey.objects.exclude(pk=self.template.pk)
+        self.assertEqual(imported.count(), 3)
+        self.assertEqual(
+            Journey.crew.through.objects.filter(journey__in=imported).count(),
+            6
+        )
+        invalidate.assert_called_once()
+
+    def test_import_csv_upload(self) -> None:
+        crew = ";".join(str(crew.id) for crew in self.crews)
+        upload = SimpleUploadedFile(
+            "season.csv",
+            (
+                "route,train,departure_time,arrival_time,crew\n"
+                f"{self.template.route_id},{self.template.train_id},"
+                f"2030-02-01T08:00:00Z,2030-02-01T14:00:00Z,{crew}\n"
+            ).encode(),
+            content_type="text/csv"
+        )
+
+        res = self.client.post(self.url, {"file": upload}, format="multipart")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        journey = Journey.objects.exclude(pk=self.template.pk).get()
+        self.assertEqual(
+            set(journey.crew.values_list("id", flat=True)),
+            {crew.id for crew in self.crews}
+        )
+
+    def test_import_reports_row_errors(self) -> None:
+        rows = self.rows(4)
+        rows[0]["route"] = self.template.route_id + 100
+        rows[1]["departure_time"] = "tomorrow"
+        rows[2]["arrival_time"] = rows[2]["departure_time"]
+
+        res = self.client.post(self.url, rows, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            [
+                (int(error["row"]), list(error["errors"]))
+                for error in res.data["rows"]
+            ],
+            [(1, ["route"]), (2, ["departure_time"]), (3, ["arrival_time"])]
+        )
+        self.assertEqual(Journey.objects.count(), 1)
+
+    def test_import_query_count_does_not_grow(self) -> None:
+        with CaptureQueriesContext(connection) as small_import:
+            self.client.post(self.url, self.rows(2), format="json")
+        with CaptureQueriesContext(connection) as large_import:
+            self.client.post(self.url, self.rows(100), format="json")
+
+        self.assertEqual(
+            len(small_import.captured_queries),
+            len(large_import.captured_queries)
+        )
+
+    def test_import_journeys_command(self) -> None:
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as timetable:
+            json.dump(self.rows(5), timetable)
+            timetable.flush()
+
+            call_command("import_journeys", timetable.name, stdout=StringIO())
+
+        self.assertEqual(Journey.objects.count(), 6)
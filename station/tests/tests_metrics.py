@@ -0,0 +1,102 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse as django_reverse
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from station.metrics import (
+    REGISTRY,
+    orders_created,
+    request_latency,
+    seat_conflicts,
+    throttled_requests
+)
+from station.models import Journey
+from station.tests.tests_journey_api import sample_journey
+
+METRICS_URL = django_reverse("metrics")
+ORDER_URL = reverse("station:order-list")
+CREW_URL = reverse("station:crew-list")
+
+
+class MetricsTest(TestCase):
+    def setUp(self) -> None:
+        for metric in REGISTRY:
+            metric.reset()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test", password="test"
+        )
+        self.client.force_authenticate(self.user)
+        self.journey = sample_journey()
+
+    def test_committed_order_is_counted(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                ORDER_URL,
+                {
+                    "tickets": [
+                        {"cargo": 1, "seat": 1, "journey": self.journey.id}
+                    ]
+                },
+                format="json"
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(orders_created.value("order"), 1)
+        self.assertEqual(
+            request_latency.count("POST", "station:order-list"), 1
+        )
+
+    def test_seat_conflict_is_counted(self) -> None:
+        Journey.book_seats(self.journey.id, [(1, 1)])
+
+        with self.assertRaises(ValidationError):
+            Journey.book_seats(self.journey.id, [(1, 1)])
+
+        self.assertEqual(seat_conflicts.value("seat_taken"), 1)
+
+    def test_seat_taken_at_validation_is_counted(self) -> None:
+        Journey.book_seats(self.journey.id, [(1, 1)])
+
+        res = self.client.post(
+            ORDER_URL,
+            {"tickets": [{"cargo": 1, "seat": 1, "journey": self.journey.id}]},
+            format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(seat_conflicts.value("seat_taken"), 1)
+
+    def test_throttled_request_is_counted(self) -> None:
+        for _ in range(31):
+            res = self.client.get(CREW_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(
+            throttled_requests.value("GET", "station:crew-list"), 1
+        )
+
+    def test_metrics_exposition(self) -> None:
+        self.client.get(CREW_URL)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res["Content-Type"].startswith("text/plain"))
+        body = res.content.decode()
+        self.assertIn(
+            "# TYPE station_request_duration_seconds histogram", body
+        )
+        self.assertIn(
+            'station_request_duration_seconds_count'
+            '{method="GET",view="station:crew-list"} 1',
+            body
+        )
+
+    def test_metrics_forbidden_for_other_hosts(self) -> None:
+        res = self.client.get(METRICS_URL, REMOTE_ADDR="10.0.0.1")
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,360 @@
+import csv
+import json
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from station.models import Order, SeatHold, Ticket
+from station.tests.tests_journey_api import sample_journey
+
+ORDER_URL = reverse("station:order-list")
+HOLD_URL = reverse("station:seathold-list")
+ALLOCATE_URL = reverse("station:order-allocate")
+ORDER_EXPORT_URL = reverse("station:order-export")
+TICKET_EXPORT_URL = reverse("station:ticket-export")
+
+
+class AuthenticatedOrderApiTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test", password="test"
+        )
+        self.client.force_authenticate(self.user)
+        self.journey = sample_journey()
+
+    def order_payload(self, seats) -> dict:
+        return {
+            "tickets": [
+                {"cargo": cargo, "seat": seat, "journey": self.journey.id}
+                for cargo, seat in seats
+            ]
+        }
+
+    def test_create_order(self) -> None:
+        res = self.client.post(
+            ORDER_URL,
+            self.order_payload([(1, 1), (1, 2), (2, 5)]),
+            format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Ticket.objects.count(), 3)
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.tickets_sold, 3)
+        self.assertEqual(
+            self.journey.seat_map.taken_seats(), {1: [1, 2], 2: [5]}
+        )
+
+    def test_create_order_query_count_does_not_grow(self) -> None:
+        with CaptureQueriesContext(connection) as small_order:
+            self.client.post(
+                ORDER_URL, self.order_payload([(1, 1)]), format="json"
+            )
+        with CaptureQueriesContext(connection) as group_order:
+            self.client.post(
+                ORDER_URL,
+                self.order_payload([(2, seat) for seat in range(1, 11)]),
+                format="json"
+            )
+
+        self.assertEqual(
+            len(small_order.captured_queries),
+            len(group_order.captured_queries)
+        )
+
+    def test_create_order_reports_taken_seats(self) -> None:
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(
+            cargo=1, seat=2, journey=self.journey, order=order
+        )
+
+        res = self.client.post(
+            ORDER_URL,
+            self.order_payload([(1, 1), (1, 2), (1, 1)]),
+            format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["tickets"][0], {})
+        self.assertIn("seat", res.data["tickets"][1])
+        self.assertIn("seat", res.data["tickets"][2])
+        self.assertEqual(Ticket.objects.count(), 1)
+
+
+class SeatHoldApiTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test", password="test"
+        )
+        self.other_user = get_user_model().objects.create_user(
+            email="other@test.test", password="test"
+        )
+        self.client.force_authenticate(self.user)
+        self.journey = sample_journey()
+
+    def hold(self, seats):
+        return self.client.post(
+            HOLD_URL,
+            {
+                "journey": self.journey.id,
+                "seats": [
+                    {"cargo": cargo, "seat": seat} for cargo, seat in seats
+                ]
+            },
+            format="json"
+        )
+
+    def order(self, seats):
+        return self.client.post(
+            ORDER_URL,
+            {
+                "tickets": [
+                    {"cargo": cargo, "seat": seat, "journey": self.journey.id}
+                    for cargo, seat in seats
+                ]
+            },
+            format="json"
+        )
+
+    def test_hold_then_order_releases_hold(self) -> None:
+        res = self.hold([(1, 1), (1, 2)])
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 2)
+
+        res = self.order([(1, 1), (1, 2)])
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_seat_held_by_other_user_rejected(self) -> None:
+        self.hold([(1, 1)])
+        self.client.force_authenticate(self.other_user)
+
+        self.assertEqual(
+            self.hold([(1, 1)]).status_code,
+            status.HTTP_400_BAD_REQUEST
+        )
+        res = self.order([(1, 1)])
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("seat", res.data["tickets"][0])
+
+    def test_expired_hold_does_not_block(self) -> None:
+        self.hold([(1, 1)])
+        SeatHold.objects.update(expires_at=timezone.now())
+        self.client.force_authenticate(self.other_user)
+
+        self.assertEqual(
+            self.order([(1, 1)]).status_code,
+            status.HTTP_201_CREATED
+        )
+
+    def test_expire_seat_holds_command(self) -> None:
+        self.hold([(1, 1), (1, 2)])
+        SeatHold.objects.filter(seat=1).update(expires_at=timezone.now())
+
+        call_command("expire_seat_holds", stdout=StringIO())
+
+        self.assertEqual(
+            list(SeatHold.objects.values_list("seat", flat=True)), [2]
+        )
+
+
+class SeatAllocationApiTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test", password="test"
+        )
+        self.client.force_authenticate(self.user)
+        self.journey = sample_journey()
+        order = Order.objects.create(user=self.user)
+        for seat in (1, 2, 5):
+            Ticket.objects.create(
+                cargo=1, seat=seat, journey=self.journey, order=order
+            )
+
+    def allocate(self, party_size):
+        return self.client.post(
+            ALLOCATE_URL,
+            {"journey": self.journey.id, "party_size": party_size},
+            format="json"
+        )
+
+    def test_allocate_adjacent_seats(self) -> None:
+        res = self.allocate(3)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [
+                (ticket["cargo"], ticket["seat"])
+                for ticket in res.data["tickets"]
+            ],
+            [(1, 6), (1, 7), (1, 8)]
+        )
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.tickets_sold, 6)
+
+    def test_allocate_skips_seats_held_by_others(self) -> None:
+        SeatHold.objects.create(
+            journey=self.journey,
+            cargo=1,
+            seat=3,
+            user=get_user_model().objects.create_user(
+                email="other@test.test", password="test"
+            ),
+            expires_at=timezone.now() + timedelta(minutes=5)
+        )
+
+        res = self.allocate(2)
+
+        self.assertEqual(
+            [
+                (ticket["cargo"], ticket["seat"])
+                for ticket in res.data["tickets"]
+            ],
+            [(1, 6), (1, 7)]
+        )
+
+    def test_allocate_more_than_available(self) -> None:
+        res = self.allocate(28)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.filter(tickets__isnull=True).exists())
+
+
+class OrderListQueryCountTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test", password="test"
+        )
+        self.client.force_authenticate(self.user)
+
+    def create_orders(self, tickets_per_order):
+        for _ in range(3):
+            order = Order.objects.create(user=self.user)
+            for seat in range(1, tickets_per_order + 1):
+                Ticket.objects.create(
+                    cargo=1, seat=seat, journey=sample_journey(), order=order
+                )
+
+    def list_queries(self) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(ORDER_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return len(queries.captured_queries)
+
+    def test_order_list_query_count_is_constant(self) -> None:
+        self.create_orders(tickets_per_order=1)
+        single_ticket_queries = self.list_queries()
+
+        Order.objects.all().delete()
+        self.create_orders(tickets_per_order=5)
+
+        self.assertEqual(self.list_queries(), single_ticket_queries)
+
+
+class ExportTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            email="admin@admin.test", password="test", is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+        self.journey = sample_journey()
+        self.orders = [Order.objects.create(user=self.admin) for _ in range(3)]
+        for index, order in enumerate(self.orders):
+            Ticket.objects.bulk_create(
+                Ticket(
+                    cargo=index + 1,
+                    seat=seat,
+                    journey=self.journey,
+                    order=order
+                )
+                for seat in range(1, index + 2)
+            )
+
+    def test_export_orders_as_csv(self) -> None:
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(ORDER_EXPORT_URL)
+            content = b"".join(res.streaming_content).decode()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "text/csv")
+        self.assertEqual(len(queries.captured_queries), 1)
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual(
+            [(int(row["id"]), int(row["tickets"])) for row in rows],
+            [(order.id, index + 1) for index, order in enumerate(self.orders)]
+        )
+        self.assertEqual(rows[0]["user"], self.admin.email)
+
+    def test_export_tickets_as_ndjson(self) -> None:
+        res = self.client.get(
+            TICKET_EXPORT_URL,
+            {
+                "file_format": "ndjson",
+                "created_after": self.orders[2].created_at.isoformat()
+            }
+        )
+
+        tickets = [
+            json.loads(line)
+            for line in b"".join(res.streaming_content).splitlines()
+        ]
+        self.assertEqual(len(tickets), 3)
+        self.assertEqual(tickets[0]["order"], self.orders[2].id)
+        self.assertEqual(tickets[0]["source"], "Kyiv")
+        self.assertEqual(tickets[0]["cargo"], 3)
+
+    async def test_export_streams_asynchronously_under_asgi(self) -> None:
+        token = AccessToken.for_user(self.admin)
+
+        res = await self.async_client.get(
+            ORDER_EXPORT_URL,
+            {"file_format": "ndjson"},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+
+        self.assertTrue(res.is_async)
+        content = b"".join([chunk async for chunk in res.streaming_content])
+        self.assertEqual(
+            [json.loads(line)["id"] for line in content.splitlines()],
+            [order.id for order in self.orders]
+        )
+
+    def test_export_rejects_impossible_dates(self) -> None:
+        for value in ("2024-02-30T00:00", "yesterday"):
+            res = self.client.get(
+                TICKET_EXPORT_URL, {"created_after": value}
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_rejects_unknown_format(self) -> None:
+        res = self.client.get(ORDER_EXPORT_URL, {"file_format": "xlsx"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_requires_admin(self) -> None:
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="test@test.test", password="test"
+            )
+        )
+
+        for url in (ORDER_EXPORT_URL, TICKET_EXPORT_URL):
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
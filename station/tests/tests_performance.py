@@ -0,0 +1,128 @@
+import os
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import TestCase, tag
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from station.tests.factories import seed_timetable
+from station.urls import router
+
+PERF_SCALE = int(os.getenv("PERF_SCALE", "1"))
+P95_BUDGET = float(os.getenv("PERF_P95_MS", "500")) / 1000
+REQUESTS = 20
+
+LIST_QUERY_BUDGETS = {
+    "crew": 2,
+    "station": 2,
+    "train": 2,
+    "traintype": 2,
+    "order": 5,
+    "journey": 3,
+    "ticket": 2,
+    "route": 2,
+    "seathold": 2,
+}
+
+RETRIEVE_QUERY_BUDGETS = {
+    "crew": 1,
+    "station": 1,
+    "train": 1,
+    "traintype": 1,
+    "order": 2,
+    "journey": 3,
+    "ticket": 1,
+    "route": 1,
+}
+
+
+class EndpointBudgetTest(TestCase):
+    """Query count and p95 latency budgets for every station endpoint.
+
+    Volumes grow with PERF_SCALE (PERF_SCALE=10 seeds 20k journeys and
+    200k tickets), the latency budget is PERF_P95_MS milliseconds.
+    Latency depends on the machine, so those tests are tagged
+    "performance" and only run with `--tag performance`.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email="admin@admin.test", password="test", is_staff=True
+        )
+        cls.objects = seed_timetable(cls.user, journeys=2000 * PERF_SCALE)
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assert_query_budget(self, url, max_queries):
+        cache.clear()
+        caches["responses"].clear()
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertLessEqual(
+            len(queries.captured_queries),
+            max_queries,
+            "\n".join(query["sql"] for query in queries.captured_queries)
+        )
+
+    def assert_latency_budget(self, url):
+        timings = []
+        for _ in range(REQUESTS):
+            started = time.perf_counter()
+            self.client.get(url)
+            timings.append(time.perf_counter() - started)
+        p95 = statistics.quantiles(timings, n=20)[-1]
+        self.assertLessEqual(p95, P95_BUDGET)
+
+    def list_urls(self):
+        return {
+            basename: reverse(f"station:{basename}-list")
+            for basename in LIST_QUERY_BUDGETS
+        }
+
+    def retrieve_urls(self):
+        return {
+            basename: reverse(
+                f"station:{basename}-detail",
+                args=(self.objects[basename].id,)
+            )
+            for basename in RETRIEVE_QUERY_BUDGETS
+        }
+
+    def test_every_endpoint_has_budget(self) -> None:
+        basenames = {basename for _, _, basename in router.registry}
+        self.assertEqual(basenames, set(LIST_QUERY_BUDGETS))
+
+    def test_list_budgets(self) -> None:
+        for basename, url in self.list_urls().items():
+            with self.subTest(basename):
+                self.assert_query_budget(url, LIST_QUERY_BUDGETS[basename])
+
+    def test_retrieve_budgets(self) -> None:
+        for basename, url in self.retrieve_urls().items():
+            with self.subTest(basename):
+                self.assert_query_budget(
+                    url, RETRIEVE_QUERY_BUDGETS[basename]
+                )
+
+    @tag("performance")
+    def test_list_latency(self) -> None:
+        for basename, url in self.list_urls().items():
+            with self.subTest(basename):
+                self.assert_latency_budget(url)
+
+    @tag("performance")
+    def test_retrieve_latency(self) -> None:
+        for basename, url in self.retrieve_urls().items():
+            with self.subTest(basename):
+                self.assert_latency_budget(url)
@@ -0,0 +1,63 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from station.models import Crew
+from station.profiling import profile_stats
+
+PROFILING_URL = reverse("station:profiling")
+CREW_URL = reverse("station:crew-list")
+
+
+class ProfilingTest(TestCase):
+    def setUp(self) -> None:
+        profile_stats.reset()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="admin@admin.test", password="test", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        Crew.objects.create(first_name="John", last_name="Doe")
+
+    @mock.patch("station.profiling.settings.PROFILING_SAMPLE_RATE", 1)
+    def test_sampled_request_is_profiled(self) -> None:
+        self.client.get(CREW_URL)
+
+        res = self.client.get(PROFILING_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        crew_list = res.data["GET station:crew-list"]
+        self.assertEqual(crew_list["requests"], 1)
+        self.assertGreater(crew_list["queries"]["sum"], 0)
+        self.assertGreater(crew_list["serializer_ms"]["sum"], 0)
+
+    @mock.patch("station.profiling.settings.PROFILING_SAMPLE_RATE", 0)
+    def test_unsampled_request_is_not_profiled(self) -> None:
+        self.client.get(CREW_URL)
+
+        res = self.client.get(PROFILING_URL)
+
+        self.assertEqual(res.data, {})
+
+    def test_reset_profile(self) -> None:
+        profile_stats.record("GET station:crew-list", {"queries": 1})
+
+        res = self.client.delete(PROFILING_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(profile_stats.as_dict(), {})
+
+    def test_profiling_requires_admin(self) -> None:
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="test@test.test", password="test"
+            )
+        )
+
+        res = self.client.get(PROFILING_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,165 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from station.distances import distances
+from station.models import Route, Station
+
+DISTANCE_URL = reverse("station:route-distance")
+
+
+def sample_station(name, **params) -> Station:
+    defaults = {"latitude": 50.45, "longitude": 30.52}
+    defaults.update(params)
+    return Station.objects.create(name=name, **defaults)
+
+
+class RouteDistanceTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test", password="test"
+        )
+        self.client.force_authenticate(self.user)
+        distances.invalidate()
+
+        self.kyiv, self.lviv, self.chop, self.uzhhorod = (
+            sample_station(name)
+            for name in ("Kyiv", "Lviv", "Chop", "Uzhhorod")
+        )
+        self.kyiv_lviv = Route.objects.create(
+            source=self.kyiv, destination=self.lviv, distance=540
+        )
+        self.lviv_chop = Route.objects.create(
+            source=self.lviv, destination=self.chop, distance=250
+        )
+        Route.objects.create(
+            source=self.kyiv, destination=self.chop, distance=900
+        )
+        self.chop_uzhhorod = Route.objects.create(
+            source=self.chop, destination=self.uzhhorod, distance=25
+        )
+
+    def distance(self, source, destination):
+        return self.client.get(
+            DISTANCE_URL,
+            {"source": source.id, "destination": destination.id}
+        )
+
+    def test_shortest_path(self) -> None:
+        res = self.distance(self.kyiv, self.uzhhorod)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["distance"], 815)
+        self.assertEqual(
+            res.data["stations"],
+            [self.kyiv.id, self.lviv.id, self.chop.id, self.uzhhorod.id]
+        )
+        self.assertEqual(
+            res.data["routes"],
+            [self.kyiv_lviv.id, self.lviv_chop.id, self.chop_uzhhorod.id]
+        )
+
+    def test_routes_are_directed(self) -> None:
+        res = self.distance(self.uzhhorod, self.kyiv)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_stations_rejected(self) -> None:
+        for params in (
+            {"source": self.kyiv.id},
+            {"source": "Kyiv", "destination": self.lviv.id},
+            {"source": self.kyiv.id, "destination": self.kyiv.id},
+        ):
+            res = self.client.get(DISTANCE_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_distance_follows_route_changes(self) -> None:
+        self.assertEqual(
+            self.distance(self.kyiv, self.uzhhorod).data["distance"], 815
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            direct = Route.objects.create(
+                source=self.kyiv, destination=self.uzhhorod, distance=800
+            )
+        res = self.distance(self.kyiv, self.uzhhorod)
+        self.assertEqual(res.data["routes"], [direct.id])
+
+        self.lviv_chop.distance = 100
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lviv_chop.save()
+        self.assertEqual(
+            self.distance(self.kyiv, self.uzhhorod).data["distance"], 665
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lviv_chop.delete()
+        self.assertEqual(
+            self.distance(self.kyiv, self.uzhhorod).data["distance"], 800
+        )
+
+    def test_unaffected_sources_stay_memoized(self) -> None:
+        self.distance(self.kyiv, self.uzhhorod)
+        self.distance(self.lviv, self.uzhhorod)
+
+        with mock.patch.object(
+            distances, "_dijkstra", wraps=distances._dijkstra
+        ) as dijkstra:
+            self.kyiv_lviv.distance = 500
+            with self.captureOnCommitCallbacks(execute=True):
+                self.kyiv_lviv.save()
+            self.assertEqual(
+                self.distance(self.lviv, self.uzhhorod).data["distance"], 275
+            )
+            self.assertEqual(
+                self.distance(self.kyiv, self.uzhhorod).data["distance"], 775
+            )
+
+        self.assertEqual(
+            [call.args for call in dijkstra.call_args_list],
+            [(distances._index[self.kyiv.id],)]
+        )
+
+    def test_rolled_back_route_change_ignored(self) -> None:
+        self.distance(self.kyiv, self.uzhhorod)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(IntegrityError):
+                with transaction.atomic():
+                    self.lviv_chop.distance = 100
+                    self.lviv_chop.save()
+                    Route.objects.create(
+                        source=self.kyiv, destination=self.lviv, distance=None
+                    )
+
+        self.assertEqual(
+            self.distance(self.kyiv, self.uzhhorod).data["distance"], 815
+        )
+
+    def test_route_change_patches_adjacency(self) -> None:
+        self.distance(self.kyiv, self.uzhhorod)
+
+        with mock.patch.object(
+            distances, "_build", wraps=distances._build
+        ) as build:
+            with self.captureOnCommitCallbacks(execute=True):
+                shortcut = Route.objects.create(
+                    source=self.lviv, destination=self.uzhhorod, distance=260
+                )
+            self.assertEqual(
+                self.distance(self.kyiv, self.uzhhorod).data["routes"],
+                [self.kyiv_lviv.id, shortcut.id]
+            )
+            with self.captureOnCommitCallbacks(execute=True):
+                shortcut.delete()
+            self.assertEqual(
+                self.distance(self.kyiv, self.uzhhorod).data["distance"], 815
+            )
+
+        build.assert_not_called()
@@ -0,0 +1,140 @@
+import math
+import random
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from station.geo import EARTH_RADIUS_KM, station_index
+from station.models import Station
+
+NEAREST_URL = reverse("station:station-nearest")
+
+
+def haversine_km(latitude1, longitude1, latitude2, longitude2) -> float:
+    latitude1, longitude1, latitude2, longitude2 = map(
+        math.radians, (latitude1, longitude1, latitude2, longitude2)
+    )
+    a = (
+        math.sin((latitude2 - latitude1) / 2) ** 2
+        + math.cos(latitude1) * math.cos(latitude2)
+        * math.sin((longitude2 - longitude1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class NearestStationsTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test", password="test"
+        )
+        self.client.force_authenticate(self.user)
+        station_index.invalidate()
+
+    def nearest(self, latitude, longitude, **params):
+        return self.client.get(
+            NEAREST_URL,
+            {"latitude": latitude, "longitude": longitude, **params}
+        )
+
+    def test_nearest_stations_ordered_by_distance(self) -> None:
+        for name, latitude, longitude in (
+            ("Kyiv", 50.45, 30.52),
+            ("Lviv", 49.84, 24.03),
+            ("Odesa", 46.48, 30.73),
+            ("Kharkiv", 49.99, 36.23),
+        ):
+            Station.objects.create(
+                name=name, latitude=latitude, longitude=longitude
+            )
+
+        res = self.nearest(50.0, 30.0, k=3)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [station["name"] for station in res.data],
+            ["Kyiv", "Odesa", "Lviv"]
+        )
+        self.assertAlmostEqual(
+            res.data[0]["distance"],
+            haversine_km(50.0, 30.0, 50.45, 30.52),
+            places=2
+        )
+
+    def test_matches_full_scan(self) -> None:
+        generator = random.Random(7)
+        stations = Station.objects.bulk_create(
+            Station(
+                name=f"Station {number}",
+                latitude=round(generator.uniform(-89, 89), 2),
+                longitude=round(generator.uniform(-180, 180), 2)
+            )
+            for number in range(300)
+        )
+        station_index.invalidate()
+
+        for _ in range(10):
+            latitude = generator.uniform(-90, 90)
+            longitude = generator.uniform(-180, 180)
+            expected = sorted(
+                stations,
+                key=lambda station: haversine_km(
+                    latitude, longitude,
+                    float(station.latitude), float(station.longitude)
+                )
+            )[:8]
+
+            nearby = station_index.nearest(latitude, longitude, 8)
+
+            self.assertEqual(
+                [station.station_id for station in nearby],
+                [station.id for station in expected]
+            )
+
+    def test_nearest_across_antimeridian(self) -> None:
+        east = Station.objects.create(
+            name="East", latitude=65.0, longitude=179.5
+        )
+        Station.objects.create(name="Far", latitude=65.0, longitude=170.0)
+
+        res = self.nearest(65.0, -179.5, k=1)
+
+        self.assertEqual(res.data[0]["id"], east.id)
+        self.assertLess(res.data[0]["distance"], 50)
+
+    def test_index_refreshed_on_station_changes(self) -> None:
+        Station.objects.create(name="Kyiv", latitude=50.45, longitude=30.52)
+        self.assertEqual(self.nearest(49.8, 24.0, k=1).data[0]["name"], "Kyiv")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Station.objects.create(
+                name="Lviv", latitude=49.84, longitude=24.03
+            )
+
+        self.assertEqual(self.nearest(49.8, 24.0, k=1).data[0]["name"], "Lviv")
+
+    def test_index_kept_until_station_change_commits(self) -> None:
+        Station.objects.create(name="Kyiv", latitude=50.45, longitude=30.52)
+        self.nearest(49.8, 24.0, k=1)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            Station.objects.create(
+                name="Lviv", latitude=49.84, longitude=24.03
+            )
+            self.assertTrue(station_index.loaded)
+
+        self.assertIn(station_index.invalidate, callbacks)
+
+    def test_invalid_parameters_rejected(self) -> None:
+        for params in (
+            {"latitude": 50},
+            {"latitude": 91, "longitude": 30},
+            {"latitude": 50, "longitude": "east"},
+            {"latitude": 50, "longitude": 30, "k": 0},
+            {"latitude": 50, "longitude": 30, "k": 51},
+        ):
+            res = self.client.get(NEAREST_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,9 +1,26 @@
+import os
+import shutil
+import tempfile
+import time
+from io import BytesIO, StringIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 
+from station.images import (
+    MULTIPART_OVERHEAD,
+    BoundedUploadHandler,
+    ImageTooLarge
+)
 from station.models import Train, TrainType
 from station.serializers import TrainListSerializer, TrainRetrieveSerializer
 
@@ -15,6 +32,18 @@ def detail_url(train_id):
     return reverse("station:train-detail", args=(train_id,))
 
 
+def image_upload_url(train_id):
+    return reverse("station:train-upload-image", args=(train_id,))
+
+
+def sample_image(size=(1600, 900)) -> SimpleUploadedFile:
+    output = BytesIO()
+    Image.new("RGB", size, "navy").save(output, format="JPEG")
+    return SimpleUploadedFile(
+        "train.jpg", output.getvalue(), content_type="image/jpeg"
+    )
+
+
 def sample_train(**params) -> Train:
     train_type, _ = TrainType.objects.get_or_create(name="Default Type")
     defaults = {
@@ -78,6 +107,33 @@ class AuthenticatedTrainApiTest(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_trains_list_cached_until_train_changes(self) -> None:
+        train = sample_train()
+
+        self.assertEqual(self.client.get(TRAIN_URL)["X-Cache"], "MISS")
+        self.assertEqual(self.client.get(TRAIN_URL)["X-Cache"], "HIT")
+
+        train.name = "Renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            train.save()
+        res = self.client.get(TRAIN_URL)
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["results"][0]["name"], "Renamed")
+
+    def test_response_cached_before_commit_not_served_after(self) -> None:
+        train = sample_train()
+        self.client.get(TRAIN_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            train.name = "Renamed"
+            train.save()
+            self.assertEqual(self.client.get(TRAIN_URL)["X-Cache"], "HIT")
+
+        res = self.client.get(TRAIN_URL)
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["results"][0]["name"], "Renamed")
+
     def test_create_train_forbidden(self) -> None:
         train_type = TrainType.objects.create(name="TrainType")
         payload = {
@@ -108,3 +164,202 @@ class AdminTrainTest(TestCase):
         }
         res = self.client.post(TRAIN_URL, payload)
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+
+class TrainImageTestCase(TestCase):
+    def setUp(self) -> None:
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        for target, value in (
+            ("station.images.executor.submit",
+             lambda function, *args: function(*args)),
+            ("station.images.close_old_connections", lambda: None),
+        ):
+            patcher = mock.patch(target, side_effect=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="admin@admin.test", password="testpassword", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.train = sample_train()
+
+    def post_image(self, image=None, train=None):
+        train = train or self.train
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                image_upload_url(train.id),
+                {"image": image or sample_image()},
+                format="multipart"
+            )
+
+    def upload(self, image=None, train=None):
+        train = train or self.train
+        res = self.post_image(image, train)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        train.refresh_from_db()
+
+
+class TrainImageVariantsTest(TrainImageTestCase):
+    def test_upload_generates_resized_variants(self) -> None:
+        self.upload()
+
+        variants = self.train.image_variants
+        self.assertEqual(set(variants), {"thumbnail", "medium"})
+        for variant, width in (("thumbnail", 320), ("medium", 960)):
+            self.assertEqual(set(variants[variant]), {"webp", "jpeg"})
+            for extension, name in variants[variant].items():
+                with self.train.image.storage.open(name) as image_file:
+                    image = Image.open(image_file)
+                    self.assertEqual(image.format, extension.upper())
+                    self.assertEqual(image.size, (width, width * 9 // 16))
+
+    def test_replacing_image_renders_new_variants(self) -> None:
+        self.upload()
+        storage = self.train.image.storage
+        old_names = [
+            name
+            for formats in self.train.image_variants.values()
+            for name in formats.values()
+        ]
+
+        self.upload(sample_image((800, 800)))
+
+        for name in old_names:
+            self.assertTrue(storage.exists(name))
+        self.assertEqual(
+            Image.open(
+                storage.open(self.train.image_variants["thumbnail"]["webp"])
+            ).size,
+            (320, 320)
+        )
+
+        call_command("clean_media", "--min-age", "0", stdout=StringIO())
+        for name in old_names:
+            self.assertFalse(storage.exists(name))
+
+    def test_variant_urls_listed_and_served_with_cache_headers(self) -> None:
+        self.upload()
+
+        res = self.client.get(TRAIN_URL)
+        urls = res.data["results"][0]["image_variants"]
+        self.assertTrue(urls["thumbnail"]["webp"].startswith("http://"))
+
+        detail = self.client.get(detail_url(self.train.id))
+        self.assertEqual(detail.data["image_variants"], urls)
+        self.assertNotIn("image", detail.data)
+
+        media = self.client.get(urls["thumbnail"]["webp"])
+        self.assertEqual(media.status_code, status.HTTP_200_OK)
+        self.assertIn("immutable", media["Cache-Control"])
+        self.assertIn("max-age=31536000", media["Cache-Control"])
+
+
+class TrainImageUploadTest(TrainImageTestCase):
+    @mock.patch("station.images.settings.TRAIN_IMAGE_MAX_SIZE", 1024)
+    def test_oversized_upload_rejected(self) -> None:
+        res = self.post_image()
+
+        self.assertEqual(
+            res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+        self.train.refresh_from_db()
+        self.assertFalse(self.train.image)
+
+    def test_declared_length_rejected_before_body_is_read(self) -> None:
+        handler = BoundedUploadHandler(max_size=1024)
+
+        with self.assertRaises(ImageTooLarge):
+            handler.handle_raw_input(
+                None, {}, 1024 + MULTIPART_OVERHEAD + 1, b"boundary"
+            )
+
+    @mock.patch("station.images.settings.TRAIN_IMAGE_MAX_DIMENSION", 1000)
+    def test_image_dimensions_limited(self) -> None:
+        res = self.post_image(sample_image((1600, 900)))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("1600x900", res.data["image"][0])
+
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=1024)
+    def test_upload_spooled_to_disk_and_moved_into_place(self) -> None:
+        with mock.patch(
+            "django.core.files.storage.filesystem.file_move_safe",
+            wraps=lambda old, new, **kwargs: shutil.move(old, new)
+        ) as file_move:
+            self.upload()
+
+        file_move.assert_called_once()
+        self.assertTrue(self.train.image.storage.exists(self.train.image.name))
+
+
+class ContentAddressedImageTest(TrainImageTestCase):
+    def stored_files(self):
+        return set(default_storage.walk("uploads/train"))
+
+    def test_identical_uploads_share_one_file(self) -> None:
+        other = sample_train(name="Other")
+
+        self.upload()
+        files = self.stored_files()
+        with mock.patch("station.images._render") as render:
+            self.upload(train=other)
+
+        render.assert_not_called()
+        self.assertEqual(other.image.name, self.train.image.name)
+        self.assertEqual(other.image_variants, self.train.image_variants)
+        self.assertEqual(self.stored_files(), files)
+
+    def test_reused_file_protected_from_collection(self) -> None:
+        self.upload()
+        shared = self.train.image.name
+        past = time.time() - 2 * 60 * 60
+        os.utime(default_storage.path(shared), (past, past))
+
+        self.upload(sample_image((800, 800)))
+        other = sample_train(name="Other")
+        with mock.patch("station.images.executor.submit"):
+            res = self.post_image(train=other)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertGreater(
+            os.path.getmtime(default_storage.path(shared)), past
+        )
+
+        Train.objects.filter(pk=other.pk).update(image="")
+        call_command("clean_media", stdout=StringIO())
+        self.assertTrue(default_storage.exists(shared))
+
+    def test_lost_rendering_is_rendered_again(self) -> None:
+        with mock.patch("station.images.executor.submit"):
+            self.upload()
+        self.assertEqual(self.train.image_variants, {})
+
+        out = StringIO()
+        call_command("render_image_variants", stdout=out)
+
+        self.assertIn("Rendered variants of 1 trains", out.getvalue())
+        self.train.refresh_from_db()
+        self.assertEqual(
+            set(self.train.image_variants), {"thumbnail", "medium"}
+        )
+        out = StringIO()
+        call_command("render_image_variants", "--dry-run", stdout=out)
+        self.assertIn("Found 0 trains missing variants", out.getvalue())
+
+    def test_clean_media_removes_orphans(self) -> None:
+        self.upload()
+        orphan = default_storage.save(
+            "uploads/train/orphan.jpg", ContentFile(b"orphan")
+        )
+        referenced = self.stored_files() - {orphan}
+
+        call_command("clean_media", "--min-age", "0", stdout=StringIO())
+
+        self.assertEqual(self.stored_files(), referenced)
+        self.assertIn(self.train.image.name, referenced)
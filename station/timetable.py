@@ -0,0 +1,201 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime, time, timedelta
+from pathlib import Path
+
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from station.models import Journey
+from train_station import settings
+
+COLUMNS = (
+    "id",
+    "route",
+    "source",
+    "destination",
+    "departure_time",
+    "arrival_time",
+    "train",
+    "tickets_available",
+)
+
+
+class TimetableSnapshot:
+    """Gzipped columnar export of future journeys, one partition per day.
+
+    Each partition is a gzip member holding one JSON line with a list of
+    values per column, so the partitions concatenated in date order form
+    a single valid `.ndjson.gz` download. A partition is only rewritten
+    when the count, ids or versions of its journeys change; `manifest`
+    lists the current partitions and their fingerprints. Replaced
+    partitions stay on disk for TIMETABLE_SNAPSHOT_GRACE, so downloads
+    that started from the previous manifest can finish.
+    """
+
+    MANIFEST = "manifest.json"
+
+    def __init__(self, directory=None):
+        self.directory = Path(directory or settings.TIMETABLE_SNAPSHOT_DIR)
+
+    @staticmethod
+    def _day_bounds(day):
+        start = timezone.make_aware(datetime.combine(day, time.min))
+        return start, start + timedelta(days=1)
+
+    @staticmethod
+    def _fingerprints(start) -> dict:
+        days = (
+            Journey.objects
+            .filter(departure_time__gte=start)
+            .annotate(day=TruncDate("departure_time"))
+            .values("day")
+            .annotate(
+                journeys=Count("id"), ids=Sum("id"), versions=Sum("version")
+            )
+            .order_by("day")
+        )
+        return {
+            row["day"].isoformat(): hashlib.md5(
+                f"{row['journeys']}:{row['ids']}:{row['versions']}".encode()
+            ).hexdigest()[:12]
+            for row in days
+        }
+
+    def _partition(self, day) -> bytes:
+        columns = {column: [] for column in COLUMNS}
+        start, end = self._day_bounds(day)
+        rows = (
+            Journey.objects
+            .filter(departure_time__gte=start, departure_time__lt=end)
+            .order_by("departure_time", "id")
+            .values_list(
+                "id",
+                "route_id",
+                "route__source_id",
+                "route__destination_id",
+                "departure_time",
+                "arrival_time",
+                "train_id",
+                "train__cargo_num",
+                "train__places_in_cargo",
+                "tickets_sold",
+            )
+        )
+        for (
+            journey_id, route_id, source_id, destination_id, departure,
+            arrival, train_id, cargo_num, places_in_cargo, tickets_sold
+        ) in rows.iterator(chunk_size=2000):
+            columns["id"].append(journey_id)
+            columns["route"].append(route_id)
+            columns["source"].append(source_id)
+            columns["destination"].append(destination_id)
+            columns["departure_time"].append(int(departure.timestamp()))
+            columns["arrival_time"].append(int(arrival.timestamp()))
+            columns["train"].append(train_id)
+            columns["tickets_available"].append(
+                cargo_num * places_in_cargo - tickets_sold
+            )
+
+        line = json.dumps(
+            {"date": day.isoformat(), "columns": columns},
+            separators=(",", ":")
+        )
+        return gzip.compress(f"{line}\n".encode(), mtime=0)
+
+    def _write(self, name: str, data: bytes):
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as temp_file:
+            temp_file.write(data)
+        os.replace(temp_path, self.directory / name)
+
+    def manifest(self):
+        try:
+            with open(self.directory / self.MANIFEST) as manifest_file:
+                return json.load(manifest_file)
+        except FileNotFoundError:
+            return None
+
+    def build(self, full=False) -> dict:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        today = timezone.now().date()
+        fingerprints = self._fingerprints(self._day_bounds(today)[0])
+
+        previous = {}
+        manifest = self.manifest() or {"partitions": [], "retired": {}}
+        if not full:
+            previous = {
+                partition["date"]: partition
+                for partition in manifest["partitions"]
+            }
+
+        partitions = []
+        written = 0
+        for day, fingerprint in fingerprints.items():
+            partition = previous.get(day)
+            if partition is None or partition["fingerprint"] != fingerprint:
+                data = self._partition(datetime.fromisoformat(day).date())
+                partition = {
+                    "date": day,
+                    "fingerprint": fingerprint,
+                    "file": f"{day}-{fingerprint}.json.gz",
+                    "size": len(data),
+                }
+                self._write(partition["file"], data)
+                written += 1
+            partitions.append(partition)
+
+        current = {partition["file"] for partition in partitions}
+        now = timezone.now()
+        retired = {
+            name: datetime.fromisoformat(retired_at)
+            for name, retired_at in manifest.get("retired", {}).items()
+            if name not in current
+        }
+        for path in self.directory.glob("*.json.gz"):
+            if path.name not in current:
+                retired.setdefault(path.name, now)
+        expired = {
+            name for name, retired_at in retired.items()
+            if now - retired_at >= settings.TIMETABLE_SNAPSHOT_GRACE
+        }
+
+        etag = hashlib.md5(
+            "".join(partition["file"] for partition in partitions).encode()
+        ).hexdigest()
+        self._write(
+            self.MANIFEST,
+            json.dumps(
+                {
+                    "generated_at": now.isoformat(),
+                    "etag": etag,
+                    "columns": COLUMNS,
+                    "partitions": partitions,
+                    "retired": {
+                        name: retired_at.isoformat()
+                        for name, retired_at in retired.items()
+                        if name not in expired
+                    },
+                }
+            ).encode()
+        )
+
+        for name in expired:
+            (self.directory / name).unlink(missing_ok=True)
+        removed = len(expired)
+
+        return {
+            "partitions": len(partitions),
+            "written": written,
+            "removed": removed,
+        }
+
+    def iter_bytes(self, manifest, chunk_size=64 * 1024):
+        for partition in manifest["partitions"]:
+            with open(self.directory / partition["file"], "rb") as part:
+                while chunk := part.read(chunk_size):
+                    yield chunk
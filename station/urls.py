@@ -1,6 +1,12 @@
 from django.urls import path, include
 from rest_framework import routers
 
+from station.async_views import (
+    AsyncJourneyListView,
+    AsyncJourneyDetailView,
+    AsyncJourneySeatsView,
+    AsyncJourneySeatEventsView
+)
 from station.views import (
     CrewViewSet,
     StationViewSet,
@@ -8,8 +14,11 @@ from station.views import (
     OrderViewSet,
     JourneyViewSet,
     TicketViewSet,
+    SeatHoldViewSet,
     RouteViewSet,
-    TrainTypeViewSet
+    TrainTypeViewSet,
+    ResponseCacheStatsView,
+    ProfileStatsView
 )
 
 router = routers.DefaultRouter()
@@ -21,7 +30,36 @@ router.register("orders", OrderViewSet)
 router.register("journeys", JourneyViewSet)
 router.register("tickets", TicketViewSet)
 router.register("routes", RouteViewSet)
+router.register("holds", SeatHoldViewSet)
 
-urlpatterns = [path("", include(router.urls))]
+urlpatterns = [
+    path("", include(router.urls)),
+    path(
+        "async/journeys/",
+        AsyncJourneyListView.as_view(),
+        name="journey-list-async"
+    ),
+    path(
+        "async/journeys/<int:pk>/",
+        AsyncJourneyDetailView.as_view(),
+        name="journey-detail-async"
+    ),
+    path(
+        "async/journeys/<int:pk>/seats/",
+        AsyncJourneySeatsView.as_view(),
+        name="journey-seats-async"
+    ),
+    path(
+        "async/journeys/<int:pk>/seats/events/",
+        AsyncJourneySeatEventsView.as_view(),
+        name="journey-seat-events"
+    ),
+    path(
+        "cache-stats/",
+        ResponseCacheStatsView.as_view(),
+        name="cache-stats"
+    ),
+    path("profiling/", ProfileStatsView.as_view(), name="profiling"),
+]
 
 app_name = "station"
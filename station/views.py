@@ -1,11 +1,40 @@
-from django.db.models import Count, F
+import hashlib
+import os
+from datetime import timedelta
+
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import quote_etag
+from django.utils.http import parse_etags
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
-from rest_framework import viewsets, status
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError, NotFound
 from rest_framework.pagination import PageNumberPagination
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from station.cache import (
+    CachedResponseMixin,
+    namespace_versions,
+    response_cache_stats
+)
+from station.distances import distances
+from station.events import issue_ticket
+from station.exports import (
+    ORDER_COLUMNS,
+    TICKET_COLUMNS,
+    created_between,
+    export_response,
+    order_export_queryset,
+    ticket_export_queryset
+)
+from station.geo import station_index
+from station.images import limit_upload_size
+from station.imports import JourneyImporter, read_rows
 from station.models import (
     Crew,
     Station,
@@ -14,8 +43,20 @@ from station.models import (
     Journey,
     Ticket,
     Route,
+    SeatHold,
     TrainType
 )
+from station.pagination import (
+    CursorPaginationMixin,
+    JourneyCursorPagination,
+    OrderCursorPagination,
+    TicketCursorPagination
+)
+from station.params import datetime_param, station_param
+from station.planner import planner
+from station.profiling import profile_stats
+from station.streaming import streaming_content
+from station.timetable import TimetableSnapshot
 from station.serializers import (
     CrewSerializer,
     StationSerializer,
@@ -27,18 +68,26 @@ from station.serializers import (
     RouteSerializer,
     JourneyListSerializer,
     JourneyRetrieveSerializer,
+    JourneySeatsSerializer,
+    SeatEventsTicketSerializer,
+    JourneyImportRowSerializer,
     RouteListSerializer,
     RouteRetrieveSerializer,
     TrainListSerializer,
     TrainRetrieveSerializer,
     OrderListSerializer,
-    TrainImageSerializer
+    TrainImageSerializer,
+    SeatHoldSerializer,
+    SeatHoldCreateSerializer,
+    SeatAllocationSerializer
 )
+from train_station import settings
 
 
-class CrewViewSet(viewsets.ModelViewSet):
+class CrewViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Crew.objects.all()
     serializer_class = CrewSerializer
+    cache_namespaces = ("crews",)
 
     @extend_schema(summary="Get list of crews",
                    description="Returns a list of all crew members.")
@@ -82,9 +131,10 @@ class CrewViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class StationViewSet(viewsets.ModelViewSet):
+class StationViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Station.objects.all()
     serializer_class = StationSerializer
+    cache_namespaces = ("stations",)
 
     @extend_schema(
         summary="Get list of stations",
@@ -129,10 +179,85 @@ class StationViewSet(viewsets.ModelViewSet):
     def destroy(self, request, *args, **kwargs):
         return super().destroy(request, *args, **kwargs)
 
+    @staticmethod
+    def _param_to_coordinate(name, value, limit):
+        try:
+            coordinate = float(value)
+        except ValueError:
+            coordinate = None
+        if coordinate is None or not -limit <= coordinate <= limit:
+            raise ValidationError(
+                {name: f"Expected a number from -{limit} to {limit}, "
+                       f"not {value}"}
+            )
+        return coordinate
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "latitude",
+                type={"type": "number"},
+                required=True,
+                description="Latitude in degrees (ex. ?latitude=50.45)"
+            ),
+            OpenApiParameter(
+                "longitude",
+                type={"type": "number"},
+                required=True,
+                description="Longitude in degrees (ex. ?longitude=30.52)"
+            ),
+            OpenApiParameter(
+                "k",
+                type={"type": "number"},
+                description="Number of stations, defaults to 5 "
+                            "(ex. ?k=10)"
+            )
+        ],
+        summary="Find nearest stations",
+        description="Returns the stations closest to a point, nearest "
+                    "first, with the great circle distance in kilometres."
+    )
+    @action(methods=["GET"], detail=False, url_path="nearest")
+    def nearest(self, request):
+        params = request.query_params
+        for param in ("latitude", "longitude"):
+            if param not in params:
+                raise ValidationError({param: "This parameter is required"})
+        latitude = self._param_to_coordinate(
+            "latitude", params["latitude"], 90
+        )
+        longitude = self._param_to_coordinate(
+            "longitude", params["longitude"], 180
+        )
+        k = params.get("k", "5")
+        if not k.isdigit() or not 1 <= int(k) <= settings.NEAREST_STATIONS_MAX:
+            raise ValidationError(
+                {
+                    "k": f"Expected a number from 1 to "
+                         f"{settings.NEAREST_STATIONS_MAX}, not {k}"
+                }
+            )
 
-class TrainViewSet(viewsets.ModelViewSet):
+        nearby = station_index.nearest(latitude, longitude, int(k))
+        stations = Station.objects.in_bulk(
+            [station.station_id for station in nearby]
+        )
+        return Response(
+            [
+                {
+                    **self.get_serializer(stations[station.station_id]).data,
+                    "distance": round(station.distance, 3),
+                }
+                for station in nearby
+                if station.station_id in stations
+            ]
+        )
+
+
+class TrainViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Train.objects.all()
     serializer_class = TrainSerializer
+    cache_namespaces = ("trains", "train_types")
 
     def get_serializer_class(self):
         serializer_class = self.serializer_class
@@ -163,6 +288,7 @@ class TrainViewSet(viewsets.ModelViewSet):
         url_path="upload-image"
     )
     def upload_image(self, request, pk=None):
+        limit_upload_size(request)
         train = self.get_object()
         serializer = self.get_serializer(train, data=request.data)
         if serializer.is_valid():
@@ -222,9 +348,10 @@ class TrainViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class TrainTypeViewSet(viewsets.ModelViewSet):
+class TrainTypeViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = TrainType.objects.all()
     serializer_class = TrainTypeSerializer
+    cache_namespaces = ("train_types",)
 
     @extend_schema(
         summary="Get list of train types",
@@ -276,10 +403,11 @@ class OrderSetPagination(PageNumberPagination):
     max_page_size = 20
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(CursorPaginationMixin, viewsets.ModelViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
     pagination_class = OrderSetPagination
+    cursor_pagination_class = OrderCursorPagination
     permission_classes = (IsAuthenticated,)
 
     def get_queryset(self):
@@ -287,8 +415,23 @@ class OrderViewSet(viewsets.ModelViewSet):
 
         if self.action == "list":
             queryset = queryset.prefetch_related(
-                "tickets__journey__train",
-                "tickets__journey__crew"
+                Prefetch(
+                    "tickets",
+                    queryset=Ticket.objects.order_by("cargo", "seat")
+                ),
+                Prefetch(
+                    "tickets__journey",
+                    queryset=(
+                        Journey.objects
+                        .select_related(
+                            "train",
+                            "route__source",
+                            "route__destination"
+                        )
+                        .prefetch_related("crew")
+                        .defer("occupancy")
+                    )
+                )
             )
 
         return queryset
@@ -300,10 +443,78 @@ class OrderViewSet(viewsets.ModelViewSet):
         serializer_class = self.serializer_class
         if self.action == "list":
             serializer_class = OrderListSerializer
+        if self.action == "allocate":
+            serializer_class = SeatAllocationSerializer
 
         return serializer_class
 
     @extend_schema(
+        responses={status.HTTP_201_CREATED: OrderSerializer},
+        summary="Order best available seats",
+        description="Creates an order for a party on a journey, assigning "
+                    "adjacent free seats in one cargo when possible."
+    )
+    @action(methods=["POST"], detail=False, url_path="allocate")
+    def allocate(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        order = serializer.save(user=request.user)
+        return Response(
+            OrderSerializer(order).data,
+            status=status.HTTP_201_CREATED
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "file_format",
+                type={"type": "string", "enum": ["csv", "ndjson"]},
+                description="Export format, defaults to csv "
+                            "(ex. ?file_format=ndjson)"
+            ),
+            OpenApiParameter(
+                "created_after",
+                type={"type": "string", "format": "date-time"},
+                description="Ordered at or after "
+                            "(ex. ?created_after=2024-08-01T00:00)"
+            ),
+            OpenApiParameter(
+                "created_before",
+                type={"type": "string", "format": "date-time"},
+                description="Ordered at or before "
+                            "(ex. ?created_before=2024-09-01T00:00)"
+            )
+        ],
+        responses={(200, "text/csv"): OpenApiTypes.BINARY},
+        summary="Export all orders",
+        description="Streams every order of every user as CSV or NDJSON. "
+                    "Available to admins only."
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="export",
+        permission_classes=(IsAdminUser,)
+    )
+    def export(self, request):
+        return export_response(
+            request,
+            "orders",
+            created_between(
+                order_export_queryset(), "created_at", request.query_params
+            ),
+            ORDER_COLUMNS,
+            request.query_params.get("file_format", "csv")
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "pagination",
+                type={"type": "string", "enum": ["cursor"]},
+                description="Use cursor pagination (ex. ?pagination=cursor)"
+            )
+        ],
         summary="Get list of orders",
         description="Returns list of all orders."
     )
@@ -347,60 +558,202 @@ class OrderViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class JourneyViewSet(viewsets.ModelViewSet):
+class SeatHoldViewSet(
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet
+):
+    queryset = SeatHold.objects.all()
+    serializer_class = SeatHoldSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return self.queryset.filter(
+            user=self.request.user,
+            expires_at__gt=timezone.now()
+        )
+
+    def get_serializer_class(self):
+        serializer_class = self.serializer_class
+        if self.action == "create":
+            serializer_class = SeatHoldCreateSerializer
+
+        return serializer_class
+
+    @extend_schema(
+        summary="Get list of seat holds",
+        description="Returns active seat holds of the current user."
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @extend_schema(
+        responses=SeatHoldSerializer(many=True),
+        summary="Hold seats",
+        description="Holds free seats of a journey for the current user "
+                    "until they are ordered or the hold expires. Holding "
+                    "already held seats again extends the hold."
+    )
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        holds = serializer.save(user=request.user)
+        return Response(
+            SeatHoldSerializer(holds, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
+
+    @extend_schema(
+        summary="Release a seat hold",
+        description="Releases a seat held by the current user."
+    )
+    def destroy(self, request, *args, **kwargs):
+        return super().destroy(request, *args, **kwargs)
+
+
+class JourneyViewSet(CursorPaginationMixin, viewsets.ModelViewSet):
     queryset = Journey.objects.all()
     serializer_class = JourneySerializer
+    cursor_pagination_class = JourneyCursorPagination
 
     @staticmethod
     def _params_to_int(query_string):
         return [int(str_id) for str_id in query_string.split(",")]
 
+    @staticmethod
+    def format_etag(pk, version, namespaces=()):
+        tag = f"{pk}-{version}"
+        if namespaces:
+            digest = hashlib.md5(
+                namespace_versions(namespaces).encode()
+            ).hexdigest()
+            tag = f"{tag}-{digest}"
+        return quote_etag(tag)
+
+    @staticmethod
+    def etag_matches(etag, if_none_match):
+        etags = parse_etags(if_none_match or "")
+        return etag in etags or "*" in etags
+
+    def _etag(self, *namespaces):
+        try:
+            version = (
+                Journey.objects
+                .filter(pk=self.kwargs["pk"])
+                .values_list("version", flat=True)
+                .first()
+            )
+        except (TypeError, ValueError):
+            return None
+        if version is None:
+            return None
+
+        return self.format_etag(self.kwargs["pk"], version, namespaces)
+
+    def _not_modified(self, etag):
+        if etag is None:
+            return None
+
+        if self.etag_matches(
+            etag, self.request.headers.get("If-None-Match")
+        ):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag}
+            )
+        return None
+
+    def _search(self, queryset):
+        params = self.request.query_params
+        stations = {
+            param: station_param(param, params[param])
+            for param in ("source", "destination")
+            if param in params
+        }
+
+        if stations:
+            routes = Route.objects.filter(**stations).values("id")
+            queryset = queryset.filter(route__in=routes)
+
+        departure_after = params.get("departure_after")
+        if departure_after:
+            queryset = queryset.filter(
+                departure_time__gte=datetime_param(
+                    "departure_after", departure_after
+                )
+            )
+        departure_before = params.get("departure_before")
+        if departure_before:
+            queryset = queryset.filter(
+                departure_time__lte=datetime_param(
+                    "departure_before", departure_before
+                )
+            )
+
+        return queryset.order_by("departure_time", "id")
+
     def get_serializer_class(self):
         serializer_class = self.serializer_class
-        if self.action == "list":
+        if self.action in ("list", "search", "connections"):
             serializer_class = JourneyListSerializer
         if self.action == "retrieve":
             serializer_class = JourneyRetrieveSerializer
+        if self.action == "seats":
+            serializer_class = JourneySeatsSerializer
+        if self.action == "seat_events_ticket":
+            serializer_class = SeatEventsTicketSerializer
 
         return serializer_class
 
+    @classmethod
+    def filter_crews(cls, queryset, crews):
+        if crews:
+            queryset = queryset.filter(
+                crew__id__in=cls._params_to_int(crews)
+            ).distinct()
+        return queryset
+
+    @staticmethod
+    def list_queryset(queryset):
+        return (
+            queryset
+            .select_related(
+                "train",
+                "route__source",
+                "route__destination"
+            )
+            .prefetch_related("crew")
+            .defer("occupancy")
+        ).order_by("id")
+
+    @staticmethod
+    def retrieve_queryset(queryset):
+        return (
+            queryset
+            .select_related(
+                "train__train_type",
+                "route__source",
+                "route__destination"
+            )
+            .prefetch_related("crew")
+        )
+
     def get_queryset(self):
         queryset = self.queryset
-        crews = self.request.query_params.get("crews")
 
-        if crews:
-            crews = self._params_to_int(crews)
-            queryset = queryset.filter(crew__id__in=crews)
-
-        if self.action == "list":
-            queryset = (
-                queryset
-                .select_related("route", "train")
-                .prefetch_related(
-                    "crew",
-                    "route__destination",
-                    "route__source"
-                )
-                .annotate(
-                    tickets_available=(
-                            F("train__places_in_cargo")
-                            * F("train__cargo_num")
-                            - Count("tickets")
-                    )
-                )
-            ).order_by("id")
+        if self.action in ("list", "search", "connections"):
+            queryset = self.list_queryset(queryset)
+        if self.action == "search":
+            queryset = self._search(queryset)
         if self.action == "retrieve":
-            queryset = (
-                queryset
-                .select_related("route", "train")
-                .prefetch_related(
-                    "crew",
-                    "route__destination",
-                    "route__source"
-                )
-            )
+            queryset = self.retrieve_queryset(queryset)
+        if self.action == "seats":
+            queryset = queryset.select_related("train")
 
-        return queryset.distinct()
+        return self.filter_crews(
+            queryset, self.request.query_params.get("crews")
+        )
 
     @extend_schema(
         parameters=[
@@ -408,6 +761,11 @@ class JourneyViewSet(viewsets.ModelViewSet):
                 "crews",
                 type={"array": "list", "items": {"type": "number"}},
                 description="Filter by crews (ex. ?crews=1,2)"
+            ),
+            OpenApiParameter(
+                "pagination",
+                type={"type": "string", "enum": ["cursor"]},
+                description="Use cursor pagination (ex. ?pagination=cursor)"
             )
         ],
         summary="Get list of journeys",
@@ -416,12 +774,257 @@ class JourneyViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "source",
+                type={"type": "number"},
+                description="Filter by source station id (ex. ?source=1)"
+            ),
+            OpenApiParameter(
+                "destination",
+                type={"type": "number"},
+                description="Filter by destination station id "
+                            "(ex. ?destination=2)"
+            ),
+            OpenApiParameter(
+                "departure_after",
+                type={"type": "string", "format": "date-time"},
+                description="Departing at or after "
+                            "(ex. ?departure_after=2024-08-01T06:00)"
+            ),
+            OpenApiParameter(
+                "departure_before",
+                type={"type": "string", "format": "date-time"},
+                description="Departing at or before "
+                            "(ex. ?departure_before=2024-08-01T12:00)"
+            )
+        ],
+        summary="Search journeys",
+        description="Returns journeys between stations departing "
+                    "within a time window, ordered by departure time."
+    )
+    @action(methods=["GET"], detail=False, url_path="search")
+    def search(self, request):
+        return super().list(request)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "source",
+                type={"type": "number"},
+                required=True,
+                description="Source station id (ex. ?source=1)"
+            ),
+            OpenApiParameter(
+                "destination",
+                type={"type": "number"},
+                required=True,
+                description="Destination station id (ex. ?destination=3)"
+            ),
+            OpenApiParameter(
+                "departure",
+                type={"type": "string", "format": "date-time"},
+                description="Earliest departure, defaults to now "
+                            "(ex. ?departure=2024-08-01T06:00)"
+            ),
+            OpenApiParameter(
+                "min_transfer",
+                type={"type": "number"},
+                description="Minimum transfer time in minutes, "
+                            "defaults to 10 (ex. ?min_transfer=15)"
+            )
+        ],
+        summary="Plan a connection",
+        description="Returns the earliest-arriving itinerary between "
+                    "two stations, possibly with transfers."
+    )
+    @action(methods=["GET"], detail=False, url_path="connections")
+    def connections(self, request):
+        params = request.query_params
+        for param in ("source", "destination"):
+            if param not in params:
+                raise ValidationError({param: "This parameter is required"})
+        source = station_param("source", params["source"])
+        destination = station_param("destination", params["destination"])
+        if source == destination:
+            raise ValidationError(
+                {"source": "The source and destination cannot be the same"}
+            )
+
+        departure = timezone.now()
+        if params.get("departure"):
+            departure = datetime_param(
+                "departure", params["departure"]
+            )
+        min_transfer = params.get("min_transfer", "10")
+        if not min_transfer.isdigit():
+            raise ValidationError(
+                {"min_transfer": f"Expected minutes, not {min_transfer}"}
+            )
+
+        for attempt in range(2):
+            legs = planner.plan(
+                source,
+                destination,
+                departure,
+                timedelta(minutes=int(min_transfer))
+            )
+            if not legs:
+                raise NotFound("No connection found")
+
+            journeys = self.list_queryset(self.queryset).in_bulk(
+                [leg.journey_id for leg in legs]
+            )
+            if len(journeys) == len(legs):
+                break
+            # Journeys deleted by another process are only seen after a
+            # reload of the planner.
+            planner.invalidate()
+        else:
+            raise NotFound("No connection found")
+
+        serializer = self.get_serializer(
+            [journeys[leg.journey_id] for leg in legs], many=True
+        )
+        return Response(
+            {
+                "departure_time": legs[0].departure_time,
+                "arrival_time": legs[-1].arrival_time,
+                "transfers": len(legs) - 1,
+                "legs": serializer.data
+            }
+        )
+
     @extend_schema(
         summary="Retrieve journey details",
-        description="Returns details of a journey by ID."
+        description="Returns details of a journey by ID. Supports "
+                    "conditional requests with If-None-Match."
     )
     def retrieve(self, request, *args, **kwargs):
-        return super().retrieve(self, request, *args, **kwargs)
+        etag = self._etag(
+            "trains", "train_types", "routes", "stations", "crews"
+        )
+        not_modified = self._not_modified(etag)
+        if not_modified is not None:
+            return not_modified
+
+        response = super().retrieve(self, request, *args, **kwargs)
+        if etag is not None:
+            response["ETag"] = etag
+        return response
+
+    @extend_schema(
+        request={
+            "multipart/form-data": {
+                "type": "object",
+                "properties": {
+                    "file": {"type": "string", "format": "binary"},
+                    "file_format": {"type": "string", "enum": ["csv", "json"]}
+                }
+            },
+            "application/json": JourneyImportRowSerializer(many=True)
+        },
+        responses={status.HTTP_201_CREATED: OpenApiTypes.OBJECT},
+        summary="Import a timetable",
+        description="Creates journeys in bulk from an uploaded CSV or JSON "
+                    "file, or a JSON list. Nothing is created unless every "
+                    "row is valid; errors are reported by row number."
+    )
+    @action(methods=["POST"], detail=False, url_path="import")
+    def import_journeys(self, request):
+        upload = request.FILES.get("file")
+        if upload is not None:
+            file_format = request.data.get("file_format") or (
+                os.path.splitext(upload.name)[1].lstrip(".").lower()
+            )
+            rows = read_rows(upload, file_format)
+        elif isinstance(request.data, list):
+            rows = request.data
+        else:
+            raise ValidationError(
+                {"file": "Upload a CSV or JSON file or post a list of rows"}
+            )
+
+        importer = JourneyImporter()
+        created = importer.run(rows)
+        if importer.errors:
+            raise ValidationError({"rows": importer.errors})
+        return Response({"created": created}, status=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        summary="Download the timetable snapshot",
+        description="Returns all future journeys as gzipped NDJSON, one "
+                    "columnar line per departure day, as generated by the "
+                    "export_timetable command. Supports conditional "
+                    "requests with If-None-Match.",
+        responses={(200, "application/gzip"): OpenApiTypes.BINARY}
+    )
+    @action(methods=["GET"], detail=False, url_path="snapshot")
+    def snapshot(self, request):
+        snapshot = TimetableSnapshot()
+        manifest = snapshot.manifest()
+        if manifest is None:
+            raise NotFound("The timetable snapshot has not been generated")
+
+        etag = quote_etag(manifest["etag"])
+        if self.etag_matches(etag, request.headers.get("If-None-Match")):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+
+        return StreamingHttpResponse(
+            streaming_content(request, snapshot.iter_bytes(manifest)),
+            content_type="application/gzip",
+            headers={
+                "ETag": etag,
+                "Content-Length": sum(
+                    partition["size"] for partition in manifest["partitions"]
+                ),
+                "Content-Disposition":
+                    'attachment; filename="timetable.ndjson.gz"',
+            }
+        )
+
+    @extend_schema(
+        summary="Retrieve journey seat map",
+        description="Returns taken seats of a journey by cargo. Supports "
+                    "conditional requests with If-None-Match."
+    )
+    @action(methods=["GET"], detail=True, url_path="seats")
+    def seats(self, request, pk=None):
+        etag = self._etag()
+        not_modified = self._not_modified(etag)
+        if not_modified is not None:
+            return not_modified
+
+        serializer = self.get_serializer(self.get_object())
+        return Response(serializer.data, headers={"ETag": etag})
+
+    @extend_schema(
+        request=None,
+        summary="Issue a seat events ticket",
+        description="Returns a ticket that opens one seat events stream of "
+                    "the journey when passed as ?ticket=. It expires after "
+                    "SEAT_EVENTS_TICKET_TTL."
+    )
+    @action(
+        methods=["POST"],
+        detail=True,
+        url_path="seat-events-ticket",
+        permission_classes=(IsAuthenticated,)
+    )
+    def seat_events_ticket(self, request, pk=None):
+        journey = self.get_object()
+        serializer = self.get_serializer(
+            {
+                "ticket": issue_ticket(request.user.id, journey.id),
+                "expires_in": int(
+                    settings.SEAT_EVENTS_TICKET_TTL.total_seconds()
+                ),
+            }
+        )
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @extend_schema(
         summary="Create a new journey",
@@ -453,11 +1056,64 @@ class JourneyViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class TicketViewSet(viewsets.ModelViewSet):
+class TicketViewSet(CursorPaginationMixin, viewsets.ModelViewSet):
     queryset = Ticket.objects.all()
     serializer_class = TicketSerializer
+    cursor_pagination_class = TicketCursorPagination
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "file_format",
+                type={"type": "string", "enum": ["csv", "ndjson"]},
+                description="Export format, defaults to csv "
+                            "(ex. ?file_format=ndjson)"
+            ),
+            OpenApiParameter(
+                "created_after",
+                type={"type": "string", "format": "date-time"},
+                description="Ordered at or after "
+                            "(ex. ?created_after=2024-08-01T00:00)"
+            ),
+            OpenApiParameter(
+                "created_before",
+                type={"type": "string", "format": "date-time"},
+                description="Ordered at or before "
+                            "(ex. ?created_before=2024-09-01T00:00)"
+            )
+        ],
+        responses={(200, "text/csv"): OpenApiTypes.BINARY},
+        summary="Export all tickets",
+        description="Streams every ticket with its order, journey and "
+                    "train as CSV or NDJSON. Available to admins only."
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="export",
+        permission_classes=(IsAdminUser,)
+    )
+    def export(self, request):
+        return export_response(
+            request,
+            "tickets",
+            created_between(
+                ticket_export_queryset(),
+                "order__created_at",
+                request.query_params
+            ),
+            TICKET_COLUMNS,
+            request.query_params.get("file_format", "csv")
+        )
 
     @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "pagination",
+                type={"type": "string", "enum": ["cursor"]},
+                description="Use cursor pagination (ex. ?pagination=cursor)"
+            )
+        ],
         summary="Get list of tickets",
         description="Returns list of all tickets."
     )
@@ -501,9 +1157,10 @@ class TicketViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class RouteViewSet(viewsets.ModelViewSet):
+class RouteViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Route.objects.all()
     serializer_class = RouteSerializer
+    cache_namespaces = ("routes", "stations")
 
     def get_serializer_class(self):
         serializer_class = self.serializer_class
@@ -587,3 +1244,87 @@ class RouteViewSet(viewsets.ModelViewSet):
     )
     def destroy(self, request, *args, **kwargs):
         return super().destroy(request, *args, **kwargs)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "source",
+                type={"type": "number"},
+                required=True,
+                description="Source station id (ex. ?source=1)"
+            ),
+            OpenApiParameter(
+                "destination",
+                type={"type": "number"},
+                required=True,
+                description="Destination station id (ex. ?destination=3)"
+            )
+        ],
+        summary="Get network distance between stations",
+        description="Returns the shortest distance over routes between "
+                    "two stations with the stations and routes on the way.",
+        responses={200: OpenApiTypes.OBJECT}
+    )
+    @action(methods=["GET"], detail=False, url_path="distance")
+    def distance(self, request):
+        params = request.query_params
+        stations = {}
+        for param in ("source", "destination"):
+            if param not in params:
+                raise ValidationError({param: "This parameter is required"})
+            stations[param] = station_param(param, params[param])
+        if stations["source"] == stations["destination"]:
+            raise ValidationError(
+                {"source": "The source and destination cannot be the same"}
+            )
+
+        path = distances.shortest_path(
+            stations["source"], stations["destination"]
+        )
+        if path is None:
+            raise NotFound("No path found")
+
+        return Response(
+            {
+                **stations,
+                "distance": path.distance,
+                "stations": path.stations,
+                "routes": path.routes,
+            }
+        )
+
+
+class ResponseCacheStatsView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(
+        summary="Get response cache statistics",
+        description="Returns hit and miss counters of the response cache "
+                    "for this process, grouped by namespace.",
+        responses={200: OpenApiTypes.OBJECT}
+    )
+    def get(self, request):
+        return Response(response_cache_stats.as_dict())
+
+
+class ProfileStatsView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(
+        summary="Get request profiling histograms",
+        description="Returns wall time, database time, query count and "
+                    "serializer time histograms of the sampled requests "
+                    "of this process, grouped by endpoint.",
+        responses={200: OpenApiTypes.OBJECT}
+    )
+    def get(self, request):
+        return Response(profile_stats.as_dict())
+
+    @extend_schema(
+        summary="Reset request profiling histograms",
+        description="Drops the histograms collected by this process.",
+        responses={204: None}
+    )
+    def delete(self, request):
+        profile_stats.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
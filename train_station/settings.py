@@ -24,7 +24,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.getenv("SECRET_KEY")
 
 # SECURITY WARNING: don"t run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv("DEBUG", "True") == "True"
 
 ALLOWED_HOSTS = []
 
@@ -40,22 +40,31 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "rest_framework",
     "drf_spectacular",
-    "debug_toolbar",
     "station",
     "user"
 ]
 
 MIDDLEWARE = [
+    "station.metrics.MetricsMiddleware",
+    "station.profiling.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+if DEBUG:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index(
+            "django.contrib.auth.middleware.AuthenticationMiddleware"
+        ) + 1,
+        "debug_toolbar.middleware.DebugToolbarMiddleware"
+    )
+
 ROOT_URLCONF = "train_station.urls"
 
 TEMPLATES = [
@@ -93,6 +102,37 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "responses": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "responses",
+        "TIMEOUT": 60 * 60,
+    },
+    "events": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "events",
+    },
+}
+
+if os.getenv("REDIS_URL"):
+    CACHES["responses"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ["REDIS_URL"],
+        "TIMEOUT": 60 * 60,
+    }
+    CACHES["events"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ["REDIS_URL"],
+        "KEY_PREFIX": "events",
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -132,6 +172,18 @@ STATIC_URL = "static/"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = "/files/media"
 
+STORAGES = {
+    "default": {
+        "BACKEND": "station.storage.ContentAddressedStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+FILE_UPLOAD_TEMP_DIR = os.getenv("FILE_UPLOAD_TEMP_DIR")
+
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_THROTTLE_CLASSES": [
@@ -173,6 +225,45 @@ SIMPLE_JWT = {
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+TEST_RUNNER = "station.tests.runner.CacheClearingTestRunner"
+
+CONNECTION_PLANNER_MAX_AGE = timedelta(minutes=5)
+
+ROUTE_DISTANCE_MAX_AGE = timedelta(minutes=5)
+ROUTE_DISTANCE_CACHE_SIZE = 1024
+
+STATION_INDEX_MAX_AGE = timedelta(minutes=5)
+NEAREST_STATIONS_MAX = 50
+
+SEAT_HOLD_TTL = timedelta(minutes=10)
+
+SEAT_MAP_LONG_POLL_TIMEOUT = 30
+
+TIMETABLE_SNAPSHOT_DIR = os.getenv(
+    "TIMETABLE_SNAPSHOT_DIR", BASE_DIR / "snapshots"
+)
+TIMETABLE_SNAPSHOT_GRACE = timedelta(minutes=30)
+
+EXPORT_CHUNK_SIZE = 2000
+
+JOURNEY_IMPORT_BATCH_SIZE = 1000
+
+SEAT_EVENTS_HEARTBEAT = 15
+SEAT_EVENTS_QUEUE_SIZE = 100
+SEAT_EVENTS_TICKET_TTL = timedelta(seconds=30)
+
+TRAIN_IMAGE_MAX_SIZE = 10 * 1024 * 1024
+TRAIN_IMAGE_MAX_DIMENSION = 8000
+TRAIN_IMAGE_VARIANTS = {"thumbnail": 320, "medium": 960}
+IMAGE_VARIANT_WORKERS = 2
+MEDIA_MAX_AGE = 60 * 60 * 24 * 365
+
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+
 INTERNAL_IPS = {
     "127.0.0.1"
 }
+
+METRICS_ALLOWED_IPS = set(
+    filter(None, os.getenv("METRICS_ALLOWED_IPS", "").split(","))
+) | INTERNAL_IPS